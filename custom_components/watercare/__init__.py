@@ -1,18 +1,29 @@
 """Watercare custom integration."""
 
+from functools import partial
 import logging
+import shutil
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.start import async_at_started
 
 from .const import DOMAIN
 from .api import WatercareApi
+from .cache import ResponseCache
+from .coordinator import WatercareDataUpdateCoordinator
+from .readings import readings_dir
+from .storage import WatercareStore
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR]
 
+# Response caches outlive config entry reloads, keyed by entry id
+DATA_RESPONSE_CACHES = f"{DOMAIN}_response_caches"
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Watercare from a config entry."""
@@ -25,20 +36,66 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("Missing username/email or password in config entry")
         return False
 
-    api = WatercareApi(email, password)
+    store = WatercareStore(hass, entry.entry_id)
+    await store.async_load()
+
+    cache = hass.data.setdefault(DATA_RESPONSE_CACHES, {}).setdefault(
+        entry.entry_id, ResponseCache()
+    )
+    api = WatercareApi(email, password, cache=cache)
+    # Reuse tokens and account number from the last run to skip the B2C login
+    api.restore_auth_state(store.get("auth"))
+    api.set_auth_listener(lambda: store.async_set("auth", api.export_auth_state()))
+
+    coordinator = WatercareDataUpdateCoordinator(hass, entry, api, store)
+    if coordinator.async_restore():
+        # Entities start from the data saved before the restart, and the first
+        # update waits until Home Assistant has started
+        entry.async_on_unload(async_at_started(hass, coordinator.async_start))
+    else:
+        # Without saved data the accounts, and so the entities, are unknown
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await api.async_close()
+            raise
+        coordinator.async_resume_backfill()
 
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN]["api"] = api
+    hass.data[DOMAIN][entry.entry_id] = {
+        "api": api,
+        "store": store,
+        "coordinator": coordinator,
+    }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Changed options take effect on reload
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop("api")
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["coordinator"].async_shutdown()
+        await entry_data["store"].async_save()
+        await entry_data["api"].async_close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove stored tokens, state and readings when a config entry is deleted."""
+    hass.data.get(DATA_RESPONSE_CACHES, {}).pop(entry.entry_id, None)
+    await WatercareStore(hass, entry.entry_id).async_remove()
+    await hass.async_add_executor_job(
+        partial(shutil.rmtree, readings_dir(hass, entry.entry_id), ignore_errors=True)
+    )
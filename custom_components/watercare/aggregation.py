@@ -0,0 +1,262 @@
+"""Pure aggregation of Watercare usage payloads into statistics rows.
+
+Nothing here touches Home Assistant state, so the processor can run these
+in the executor when a payload is large enough to stall the event loop.
+"""
+
+from array import array
+from datetime import datetime
+import logging
+
+from homeassistant.components.recorder.models import StatisticData
+
+from .const import NZ_TIMEZONE
+from .parsing import hour_start, nz_day, nz_day_start, parse_timestamp, utc_hour
+from .tariff import TariffSchedule
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def payload_high_water_mark(payload) -> str | None:
+    """Return the newest timestamp contained in a usage or billing payload."""
+    if isinstance(payload, dict):
+        timestamps = [u.get("timestamp") for u in payload.get("usage", [])]
+    elif isinstance(payload, list):
+        # The latest billing period may still be open, so track its start
+        timestamps = [p.get("billingPeriodFromDate") for p in payload]
+    else:
+        return None
+    timestamps = [t for t in timestamps if t]
+    return max(timestamps) if timestamps else None
+
+
+def merge_payload(existing, new):
+    """Merge a freshly fetched window into the previously fetched payload.
+
+    Readings are keyed by timestamp (or billing period start) so the overlap
+    between windows replaces rather than duplicates older values.
+    """
+    if existing is None or type(existing) is not type(new):
+        return new
+
+    if isinstance(new, dict):
+        usage = {u.get("timestamp"): u for u in existing.get("usage", [])}
+        usage.update({u.get("timestamp"): u for u in new.get("usage", [])})
+        merged = {**existing, **new}
+        merged["usage"] = [usage[key] for key in sorted(usage, key=str)]
+        return merged
+
+    periods = {p.get("billingPeriodFromDate"): p for p in existing}
+    periods.update({p.get("billingPeriodFromDate"): p for p in new})
+    # Newest period first, matching the API ordering
+    return sorted(
+        periods.values(),
+        key=lambda x: x.get("billingPeriodToDate", ""),
+        reverse=True,
+    )
+
+
+def trim_payload(payload, since: str):
+    """Drop readings, and billing periods ending, before an ISO timestamp.
+
+    Keeps a payload merged across windows from growing with every poll.
+    """
+    if isinstance(payload, dict):
+        usage = [u for u in payload.get("usage", []) if u.get("timestamp", "") >= since]
+        return {**payload, "usage": usage}
+    if isinstance(payload, list):
+        return [p for p in payload if p.get("billingPeriodToDate", "") >= since]
+    return payload
+
+
+def period_days(start: int, end: int) -> int:
+    """Return the number of days in a billing period given epoch bounds."""
+    return (end - start) // 86400 + 1
+
+
+def usage_entries(payload) -> list:
+    """Return the usage readings from a usage payload."""
+    if isinstance(payload, dict):
+        return payload.get("usage", [])
+    if isinstance(payload, list):
+        return payload
+    return []
+
+
+def reading_columns(usage_data) -> tuple[array, array]:
+    """Return the epoch seconds and litres of usage readings as two columns."""
+    times = array("q")
+    litres = array("d")
+    for entry in usage_data:
+        timestamp_str = entry.get("timestamp")
+        if not timestamp_str:
+            continue
+        try:
+            times.append(parse_timestamp(timestamp_str))
+        except ValueError:
+            continue
+        litres.append(entry.get("litres") or 0)
+    return times, litres
+
+
+def aggregate_daily(usage_data, after: str = "") -> tuple[dict[int, float], str]:
+    """Sum usage readings per NZ calendar day.
+
+    Days are keyed by ``nz_day`` integers. Readings at or before the
+    ``after`` timestamp are skipped. Returns the daily totals and the
+    newest timestamp that was included.
+    """
+    daily_consumption = {}
+    newest = after
+
+    for entry in usage_data:
+        timestamp_str = entry.get("timestamp")
+        if not timestamp_str or timestamp_str <= after:
+            continue
+        try:
+            day = nz_day(parse_timestamp(timestamp_str))
+        except ValueError:
+            _LOGGER.warning(f"Failed to parse date {timestamp_str}")
+            continue
+
+        daily_consumption[day] = daily_consumption.get(day, 0) + entry.get("litres", 0)
+        newest = max(newest, timestamp_str)
+
+    return dict(sorted(daily_consumption.items())), newest
+
+
+def aggregate_hourly(usage_data, after: str = "") -> tuple[dict[int, float], str]:
+    """Sum half-hourly readings into hourly buckets.
+
+    Buckets are keyed by ``utc_hour`` integers. New Zealand offsets are
+    whole hours, so these are also local hour boundaries, and the repeated
+    hour when daylight saving ends stays two distinct buckets. Readings
+    at or before the ``after`` timestamp are skipped. Returns the hourly
+    totals and the newest timestamp that was included.
+    """
+    hourly_consumption = {}
+    newest = after
+
+    for entry in usage_data:
+        timestamp_str = entry.get("timestamp")
+        if not timestamp_str or timestamp_str <= after:
+            continue
+        try:
+            hour = utc_hour(parse_timestamp(timestamp_str))
+        except ValueError:
+            _LOGGER.warning(f"Failed to parse date {timestamp_str}")
+            continue
+        hourly_consumption[hour] = hourly_consumption.get(hour, 0) + entry.get(
+            "litres", 0
+        )
+        newest = max(newest, timestamp_str)
+
+    return dict(sorted(hourly_consumption.items())), newest
+
+
+def daily_buckets(daily_consumption: dict[int, float]) -> list:
+    """Return ``(start, litres, days)`` buckets for daily totals."""
+    return [(nz_day_start(day), litres, 1) for day, litres in daily_consumption.items()]
+
+
+def hourly_buckets(hourly_consumption: dict[int, float]) -> list:
+    """Return ``(start, litres, days)`` buckets for hourly totals."""
+    return [
+        (hour_start(hour), litres, 1 / 24)
+        for hour, litres in hourly_consumption.items()
+    ]
+
+
+def billing_buckets(billing_periods, after: str = "") -> tuple[list, str]:
+    """Return ``(end, litres, days)`` buckets for billing periods, oldest first.
+
+    Periods starting at or before ``after`` are skipped. Returns the buckets
+    and the start of the newest period included.
+    """
+    buckets = []
+    last = after
+
+    # Sort periods by date (oldest first) for cumulative calculation
+    sorted_periods = sorted(
+        billing_periods, key=lambda x: x.get("billingPeriodToDate", "")
+    )
+
+    for period in sorted_periods:
+        end_date_str = period.get("billingPeriodToDate")
+        if end_date_str and period.get("billingPeriodFromDate", "") > last:
+            try:
+                end = parse_timestamp(end_date_str)
+                numberOfDays = period_days(
+                    parse_timestamp(period.get("billingPeriodFromDate")), end
+                )
+            except (ValueError, TypeError) as e:
+                _LOGGER.warning(f"Failed to parse date {end_date_str}: {e}")
+                continue
+
+            end_date = datetime.fromtimestamp(end, NZ_TIMEZONE)
+            buckets.append((end_date, period.get("waterUsage", 0), numberOfDays))
+            last = period.get("billingPeriodFromDate", "")
+
+    return buckets, last
+
+
+def accumulate_statistics(
+    buckets,
+    tariffs: TariffSchedule,
+    keys,
+    sums: dict[str, float],
+    resume: dict[str, float],
+) -> tuple[dict[str, list[StatisticData]], dict[str, float]]:
+    """Turn ``(start, litres, days)`` buckets into running-sum rows per series.
+
+    ``keys`` are the series to produce, out of consumption, cost,
+    consumption_cost and wastewater_cost. Sums continue from ``sums`` and,
+    for series with a resume point in ``resume``, buckets starting before it
+    are skipped. Costs use the tariff in effect at each bucket. Returns the
+    rows and the new sums.
+    """
+    costs = tariffs.cost_series(buckets)
+    columns = {
+        "consumption": [litres for _, litres, _ in buckets],
+        "cost": costs["total"],
+        "consumption_cost": costs["consumption"],
+        "wastewater_cost": costs["wastewater"],
+    }
+    starts = [start for start, _, _ in buckets]
+    timestamps = [start.timestamp() for start in starts]
+
+    rows = {}
+    sums = dict(sums)
+    for key in keys:
+        since = resume.get(key, 0)
+        total = sums.get(key, 0)
+        series_rows = rows[key] = []
+        for start, timestamp, value in zip(starts, timestamps, columns[key]):
+            if timestamp < since:
+                continue
+            # HASSIO statistics requires us to add values as a sum of all previous values.
+            total += value
+            series_rows.append(StatisticData(start=start, sum=total))
+        sums[key] = total
+    return rows, sums
+
+
+def carry_sums(rows, total: float, starts) -> list[StatisticData]:
+    """Return rows with ones added at ``starts`` carrying the running sum on.
+
+    ``rows`` continue from ``total``, oldest first, and ``starts`` are the
+    epoch starts of rows recorded earlier over the same stretch. Each start
+    without a row of its own gets the sum of the row before it, so a row left
+    behind where a billing period used to end no longer counts its usage.
+    """
+    by_start = {row["start"].timestamp(): row for row in rows}
+    merged = []
+    for timestamp in sorted({*by_start, *starts}):
+        row = by_start.get(timestamp)
+        if row is None:
+            row = StatisticData(
+                start=datetime.fromtimestamp(timestamp, NZ_TIMEZONE), sum=total
+            )
+        total = row["sum"]
+        merged.append(row)
+    return merged
@@ -1,7 +1,9 @@
 """Watercare API."""
 
 import aiohttp
+import asyncio
 import logging
+import time
 from typing import Any
 from collections.abc import Mapping
 import json
@@ -9,32 +11,335 @@ import secrets
 import hashlib
 import base64
 import uuid
+from dataclasses import dataclass
 from urllib.parse import parse_qs
 
+from .cache import CACHE_TTLS, DEFAULT_CACHE_TTL, ResponseCache
+from .codec import json_loads
+from .metrics import WatercareMetrics
+from .resilience import CircuitBreaker, backoff_delay, parse_retry_after
+from .streaming import UsageStreamDecoder
+
 _LOGGER = logging.getLogger(__name__)
 
+# Production hosts; scripts/mock_server.py points the API at itself instead
+DEFAULT_URL_BASE = "https://customerapp.api.water.co.nz/"
+DEFAULT_URL_TOKEN_BASE = (
+    "https://wslpwb2cprd.b2clogin.com/tfp/wslpwb2cprd.onmicrosoft.com"
+)
+
+# Connection pool tuning for the long-lived client session
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+# Refresh tokens this many seconds before they actually expire
+TOKEN_REFRESH_MARGIN = 300
+# Lifetimes assumed when B2C omits them from a token response
+DEFAULT_ACCESS_TOKEN_LIFETIME = 3600
+DEFAULT_REFRESH_TOKEN_LIFETIME = 14 * 24 * 3600
+
+# Request retries: transient failures are retried with exponential backoff
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 2
+MAX_RETRY_DELAY = 120
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(
+    total=90, connect=15, sock_connect=15, sock_read=60
+)
+
+# Bytes handed to a streaming decoder at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+# Bodies at least this large are decoded in the executor, off the event loop
+EXECUTOR_DECODE_BYTES = 256 * 1024
+
+# Look the login's accounts up again this often, in seconds, to pick up new ones
+ACCOUNT_DISCOVERY_INTERVAL = 24 * 3600
+
+# Circuit breaker: stop requesting after this many consecutive failures
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 600
+
+
+class WatercareApiError(Exception):
+    """Raised when the Watercare API cannot be reached or answers unexpectedly."""
+
+
+class WatercareAuthError(WatercareApiError):
+    """Raised when the B2C login flow does not complete."""
+
+
+@dataclass
+class ApiResponse:
+    """Status, headers and decoded body of an API response."""
+
+    status: int
+    headers: Mapping[str, str]
+    body: Any
+
 
 class WatercareApi:
     """Define the Watercare API."""
 
-    def __init__(self, email, password):
+    def __init__(
+        self,
+        email,
+        password,
+        session: aiohttp.ClientSession = None,
+        cache: ResponseCache = None,
+        url_base: str = DEFAULT_URL_BASE,
+        url_token_base: str = DEFAULT_URL_TOKEN_BASE,
+    ):
         """Initialise the API."""
         self._client_id = "799c26af-c35b-4010-bd04-b6a7ebdba811"
         self._redirect_uri = "msauth://nz.co.watercare/yRDm0vmCd9zdnwt1eCLGp8KfdLY%3D"
-        self._url_base = "https://customerapp.api.water.co.nz/"
-        self._url_token_base = (
-            "https://wslpwb2cprd.b2clogin.com/tfp/wslpwb2cprd.onmicrosoft.com"
-        )
+        # The usage API base must end with a slash; the token base must not
+        self._url_base = url_base.rstrip("/") + "/"
+        self._url_token_base = url_token_base.rstrip("/")
         self._p = "B2C_1_sign_up_or_sign_in_mobile"
 
         self._email = email
         self._password = password
 
         self._accountNumber = None
+        self._accounts: list[str] = []
+        self._accounts_fetched_at = 0.0
         self._token = None
         self._refresh_token = None
-        self._refresh_token_expires_in = 0
-        self._access_token_expires_in = 0
+        self._refresh_token_expires_at = 0.0
+        self._access_token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._auth_listener = None
+        # Shared across reloads of the config entry when passed in
+        self.cache = cache if cache is not None else ResponseCache()
+        self.metrics = WatercareMetrics()
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+
+        self._session = session
+        self._owns_session = session is None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled client session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self.metrics.trace_config()],
+                cookie_jar=aiohttp.CookieJar(quote_cookie=False),
+            )
+            self._owns_session = True
+        return self._session
+
+    async def async_close(self):
+        """Close the client session if it is owned by this API instance."""
+        if self._owns_session and self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def export_auth_state(self) -> dict[str, Any]:
+        """Return the tokens and account number for persisting across restarts."""
+        return {
+            "username": self._email,
+            "account_number": self._accountNumber,
+            "accounts": self._accounts,
+            "accounts_fetched_at": self._accounts_fetched_at,
+            "access_token": self._token,
+            "access_token_expires_at": self._access_token_expires_at,
+            "refresh_token": self._refresh_token,
+            "refresh_token_expires_at": self._refresh_token_expires_at,
+        }
+
+    def restore_auth_state(self, state: Mapping[str, Any] | None):
+        """Restore previously persisted tokens and account number."""
+        if not state or state.get("username") != self._email:
+            return
+        self._accountNumber = state.get("account_number")
+        self._accounts = list(state.get("accounts") or [])
+        self._accounts_fetched_at = state.get("accounts_fetched_at", 0.0)
+        self._token = state.get("access_token")
+        self._access_token_expires_at = state.get("access_token_expires_at", 0.0)
+        self._refresh_token = state.get("refresh_token")
+        self._refresh_token_expires_at = state.get("refresh_token_expires_at", 0.0)
+        _LOGGER.debug("Restored stored authentication state")
+
+    @property
+    def accounts(self) -> list[str]:
+        """Return the known account numbers, primary account first."""
+        if not self._accountNumber:
+            return []
+        return [self._accountNumber] + [
+            account for account in self._accounts if account != self._accountNumber
+        ]
+
+    def set_auth_listener(self, listener):
+        """Register a callback invoked whenever tokens or account change."""
+        self._auth_listener = listener
+
+    def _auth_changed(self):
+        """Notify the listener that the authentication state changed."""
+        if self._auth_listener:
+            self._auth_listener()
+
+    def _store_tokens(self, token_data: Mapping[str, Any]):
+        """Record tokens from a B2C token response with absolute expiry times."""
+        now = time.time()
+        self._token = token_data.get("access_token")
+        self._access_token_expires_at = now + int(
+            token_data.get("expires_in") or DEFAULT_ACCESS_TOKEN_LIFETIME
+        )
+        # B2C rotates refresh tokens; keep the old one if none was returned
+        if token_data.get("refresh_token"):
+            self._refresh_token = token_data["refresh_token"]
+            self._refresh_token_expires_at = now + int(
+                token_data.get("refresh_token_expires_in")
+                or DEFAULT_REFRESH_TOKEN_LIFETIME
+            )
+        self._auth_changed()
+
+    def _access_token_valid(self) -> bool:
+        """Return True if the access token is usable for a while yet."""
+        return bool(self._token) and (
+            time.time() < self._access_token_expires_at - TOKEN_REFRESH_MARGIN
+        )
+
+    def _refresh_token_valid(self) -> bool:
+        """Return True if the refresh token can still be redeemed."""
+        return bool(self._refresh_token) and (
+            time.time() < self._refresh_token_expires_at - TOKEN_REFRESH_MARGIN
+        )
+
+    def invalidate_access_token(self):
+        """Force the next request to obtain a new access token."""
+        self._access_token_expires_at = 0.0
+
+    async def _request(
+        self, method: str, url: str, read: str = "text", **kwargs
+    ) -> ApiResponse:
+        """Make a request with retries, backoff and the circuit breaker.
+
+        Connection errors, timeouts and 429/5xx responses are retried up to
+        MAX_RETRIES times, waiting for Retry-After when the server sends it
+        and exponential backoff with jitter otherwise. Any other response is
+        returned to the caller. ``read`` is "bytes", "text", "json" or "none", or
+        "stream" to feed a 200 body to the ``sink`` decoder as it arrives
+        instead of buffering it; the body is then whatever ``sink.close()``
+        returns. Raises WatercareApiError once retries are exhausted or while the
+        circuit breaker is open.
+        """
+        session = self._get_session()
+        sink: UsageStreamDecoder | None = kwargs.pop("sink", None)
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.breaker.allow_request():
+                raise WatercareApiError("Watercare API paused after repeated failures")
+
+            delay = None
+            self.metrics.increment("requests")
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status in RETRY_STATUSES:
+                        reason = f"HTTP {response.status}"
+                        delay = parse_retry_after(response.headers, MAX_RETRY_DELAY)
+                    elif read == "stream" and response.status == 200:
+                        # A retried attempt starts the body over
+                        sink.reset()
+                        try:
+                            async for chunk in response.content.iter_chunked(
+                                STREAM_CHUNK_SIZE
+                            ):
+                                self.metrics.increment("bytes_downloaded", len(chunk))
+                                sink.feed(chunk)
+                            body = sink.close()
+                        except ValueError as err:
+                            raise self._invalid_response(url, err) from err
+                        self.breaker.record_success()
+                        return ApiResponse(response.status, response.headers, body)
+                    else:
+                        if read != "none":
+                            # Buffered, so the decoding below reuses it
+                            raw = await response.read()
+                            self.metrics.increment("bytes_downloaded", len(raw))
+                        if read == "json":
+                            # Like response.json(), an empty body decodes to None
+                            try:
+                                body = json_loads(raw) if raw.strip() else None
+                            except (json.JSONDecodeError, UnicodeDecodeError) as err:
+                                raise self._invalid_response(url, err) from err
+                        elif read == "bytes":
+                            body = raw
+                        elif read == "text":
+                            try:
+                                body = await response.text()
+                            except UnicodeDecodeError as err:
+                                raise self._invalid_response(url, err) from err
+                        else:
+                            body = None
+                        self.breaker.record_success()
+                        return ApiResponse(response.status, response.headers, body)
+            except aiohttp.InvalidURL:
+                # A bad request, which retrying will not fix
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                reason = f"{type(err).__name__}: {err}"
+
+            self.breaker.record_failure(reason)
+            if attempt == MAX_RETRIES:
+                break
+            if delay is None:
+                delay = backoff_delay(attempt, RETRY_BASE_DELAY, MAX_RETRY_DELAY)
+            self.metrics.increment("retries")
+            _LOGGER.debug(
+                f"Request to {url} failed ({reason}), retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+        raise WatercareApiError(
+            f"Request to {url} failed after {MAX_RETRIES + 1} attempts: {reason}"
+        )
+
+    def _invalid_response(self, url: str, err: Exception) -> WatercareApiError:
+        """Return the error for a response body that failed to decode.
+
+        The server did answer, so it counts as a success for the breaker.
+        """
+        self.breaker.record_success()
+        return WatercareApiError(f"Invalid response from {url}: {err}")
+
+    async def async_ensure_token(self) -> bool:
+        """Make sure a valid access token is available.
+
+        Refreshes ahead of expiry using the refresh token grant and only falls
+        back to the full B2C login once the refresh token itself has expired.
+        Concurrent callers share a single in-flight refresh.
+        """
+        if self._access_token_valid():
+            return True
+
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self._access_token_valid():
+                return True
+
+            try:
+                if self._refresh_token_valid():
+                    _LOGGER.debug("Access token expired, using refresh token")
+                    with self.metrics.timer("token_refresh"):
+                        await self.get_api_token()
+
+                if not self._access_token_valid():
+                    _LOGGER.debug("Refresh token unavailable, starting authentication")
+                    with self.metrics.timer("login"):
+                        await self.get_refresh_token()
+            except WatercareApiError as err:
+                _LOGGER.error(f"Authentication failed: {err}")
+                return False
+
+            return self._access_token_valid()
 
     def get_setting_json(self, page: str) -> Mapping[str, Any] | None:
         """Get the settings from json result."""
@@ -55,94 +360,103 @@ class WatercareApi:
         return base64.urlsafe_b64encode(code_challenge).rstrip(b"=").decode()
 
     async def get_refresh_token(self):
-        """Get the refresh token."""
+        """Get the refresh token.
+
+        Raises WatercareAuthError if B2C answers with an unexpected page.
+        """
         _LOGGER.debug("API get_refresh_token")
-        jar = aiohttp.CookieJar(quote_cookie=False)
-        async with aiohttp.ClientSession(cookie_jar=jar) as session:
-            url = f"{self._url_token_base}/{self._p}/oAuth2/v2.0/authorize"
-
-            code_verifier = self.generate_code_verifier()
-            code_challenge = self.generate_code_challenge(code_verifier)
-            client_request_id = str(uuid.uuid4())
-            scope = f"{self._client_id} openid offline_access profile"
-
-            params = {
-                "response_type": "code",
-                "code_challenge_method": "S256",
-                "client_id": self._client_id,
-                "client-request-id": client_request_id,
-                "scope": scope,
-                "prompt": "select_account",
-                "redirect_uri": self._redirect_uri,
-                "code_challenge": code_challenge,
-            }
+        session = self._get_session()
+        # Start each login with a clean jar so stale B2C cookies are not replayed
+        session.cookie_jar.clear()
 
-            async with session.get(url, params=params) as response:
-                response_text = await response.text()
+        url = f"{self._url_token_base}/{self._p}/oAuth2/v2.0/authorize"
 
-            settings_json = self.get_setting_json(response_text)
-            _LOGGER.debug(f"settings_json: {settings_json}")
+        code_verifier = self.generate_code_verifier()
+        code_challenge = self.generate_code_challenge(code_verifier)
+        client_request_id = str(uuid.uuid4())
+        scope = f"{self._client_id} openid offline_access profile"
 
-            trans_id = settings_json.get("transId")
-            csrf = settings_json.get("csrf")
+        params = {
+            "response_type": "code",
+            "code_challenge_method": "S256",
+            "client_id": self._client_id,
+            "client-request-id": client_request_id,
+            "scope": scope,
+            "prompt": "select_account",
+            "redirect_uri": self._redirect_uri,
+            "code_challenge": code_challenge,
+        }
 
-            url = f"{self._url_token_base}/{self._p}/SelfAsserted?tx={trans_id}&p={self._p}"
-            payload = {
-                "request_type": "RESPONSE",
-                "email": self._email,
-                "password": self._password,
-            }
-            headers = {"X-CSRF-TOKEN": csrf}
+        response = await self._request("GET", url, params=params)
+        try:
+            settings_json = self.get_setting_json(response.body)
+        except ValueError as err:
+            raise WatercareAuthError(f"Invalid sign-in settings: {err}") from err
+        _LOGGER.debug(f"settings_json: {settings_json}")
+
+        if not settings_json:
+            raise WatercareAuthError("Sign-in page did not contain settings")
+        trans_id = settings_json.get("transId")
+        csrf = settings_json.get("csrf")
+        if not trans_id or not csrf:
+            raise WatercareAuthError("Sign-in settings missing transaction or csrf")
+
+        url = f"{self._url_token_base}/{self._p}/SelfAsserted?tx={trans_id}&p={self._p}"
+        payload = {
+            "request_type": "RESPONSE",
+            "email": self._email,
+            "password": self._password,
+        }
+        headers = {"X-CSRF-TOKEN": csrf}
 
-            async with session.post(url, headers=headers, data=payload) as response:
-                await response.text()
+        await self._request("POST", url, read="none", headers=headers, data=payload)
 
-            url = f"{self._url_token_base}/{self._p}/api/CombinedSigninAndSignup/confirmed"
-            params = {
-                "rememberMe": "false",
-                "csrf_token": csrf,
-                "tx": trans_id,
-                "p": self._p,
-            }
+        url = f"{self._url_token_base}/{self._p}/api/CombinedSigninAndSignup/confirmed"
+        params = {
+            "rememberMe": "false",
+            "csrf_token": csrf,
+            "tx": trans_id,
+            "p": self._p,
+        }
 
-            headers = {}
-            async with session.get(
-                url, headers=headers, params=params, allow_redirects=False
-            ) as response:
-                response.raise_for_status()
-                location = response.headers.get("Location", "")
-                query_params = parse_qs(location.split("?", 1)[1])
-                if "error" in query_params:
-                    _LOGGER.error("Error in response: %s", query_params["error"][0])
-                    _LOGGER.error(
-                        "Error description: %s", query_params["error_description"][0]
-                    )
+        response = await self._request(
+            "GET", url, read="none", params=params, allow_redirects=False
+        )
+        location = response.headers.get("Location", "")
+        if response.status >= 400 or "?" not in location:
+            raise WatercareAuthError(
+                f"Sign-in was not confirmed (HTTP {response.status})"
+            )
+        query_params = parse_qs(location.split("?", 1)[1])
+        if "error" in query_params:
+            _LOGGER.error("Error in response: %s", query_params["error"][0])
+            _LOGGER.error(
+                "Error description: %s",
+                query_params.get("error_description", [""])[0],
+            )
+            raise WatercareAuthError(query_params["error"][0])
+        if "code" not in query_params:
+            raise WatercareAuthError("Sign-in redirect did not include a code")
+
+        code = query_params["code"][0]
+
+        url = f"{self._url_token_base}/{self._p}/oauth2/v2.0/token"
+        params = {
+            "client_id": self._client_id,
+            "client-request-id": client_request_id,
+            "client_info": 1,
+            "code": code,
+            "code_verifier": code_verifier,
+            "grant_type": "authorization_code",
+            "scope": scope,
+        }
 
-            code = query_params["code"][0]
-
-            url = f"{self._url_token_base}/{self._p}/oauth2/v2.0/token"
-            params = {
-                "client_id": self._client_id,
-                "client-request-id": client_request_id,
-                "client_info": 1,
-                "code": code,
-                "code_verifier": code_verifier,
-                "grant_type": "authorization_code",
-                "scope": scope,
-            }
+        response = await self._request("GET", url, read="json", params=params)
+        if response.status != 200 or not isinstance(response.body, dict):
+            raise WatercareAuthError(f"Token request failed (HTTP {response.status})")
+        self._store_tokens(response.body)
 
-            headers = {}
-            async with session.get(url, headers=headers, params=params) as response:
-                response_data = await response.json()
-                self._refresh_token = response_data.get("refresh_token")
-                self._token = response_data.get("access_token")
-                self._refresh_token_expires_in = response_data.get(
-                    "refresh_token_expires_in"
-                )
-                self._access_token_expires_in = response_data.get("expires_in")
-
-            _LOGGER.debug("Refresh token retrieved successfully.")
-            await self.get_accounts()
+        _LOGGER.debug("Refresh token retrieved successfully.")
 
     async def get_api_token(self):
         """Get token from the Watercare API."""
@@ -152,46 +466,79 @@ class WatercareApi:
             "refresh_token": self._refresh_token,
         }
 
-        jar = aiohttp.CookieJar(quote_cookie=False)
-        async with aiohttp.ClientSession(cookie_jar=jar) as session:
-            url = f"{self._url_token_base}/{self._p}/oauth2/v2.0/token"
-            async with session.post(url, data=token_data) as response:
-                if response.status == 200:
-                    jsonResult = await response.json()
-                    self._token = jsonResult["access_token"]
-                    _LOGGER.debug(f"Authenticity Token: {self._token}")
-                    await self.get_accounts()
-                else:
-                    _LOGGER.error("Failed to retrieve the token page.")
+        url = f"{self._url_token_base}/{self._p}/oauth2/v2.0/token"
+        response = await self._request("POST", url, read="json", data=token_data)
+        if response.status == 200 and isinstance(response.body, dict):
+            self._store_tokens(response.body)
+            _LOGGER.debug("Access token refreshed successfully.")
+        else:
+            _LOGGER.error("Failed to retrieve the token page.")
 
     async def get_accounts(self):
-        """Get the first account that we see."""
+        """Get every account under this login.
+
+        The first account returned becomes the primary account, unless a
+        previously known primary account is still present.
+        """
         headers = {"authorization": "Bearer " + (self._token or "")}
-        jar = aiohttp.CookieJar(quote_cookie=False)
-        async with (
-            aiohttp.ClientSession(cookie_jar=jar) as session,
-            session.get(self._url_base + "v1/account", headers=headers) as result,
-        ):
-            if result.status == 200:
-                data = await result.json()
-                _LOGGER.debug(f"Accounts: {data}")
-                if data and isinstance(data, list) and len(data) > 0:
-                    self._accountNumber = data[0].get("accountNumber")
-                    if self._accountNumber:
-                        _LOGGER.debug(f"AccountNumber: {self._accountNumber}")
-                    else:
-                        _LOGGER.error("Account number not found in the response")
+        try:
+            result = await self._request(
+                "GET", self._url_base + "v1/account", read="json", headers=headers
+            )
+        except WatercareApiError as err:
+            _LOGGER.error(f"Failed to fetch customer accounts: {err}")
+            return
+        if result.status == 200:
+            data = result.body
+            _LOGGER.debug(f"Accounts: {data}")
+            if data and isinstance(data, list) and len(data) > 0:
+                accounts = [
+                    account["accountNumber"]
+                    for account in data
+                    if isinstance(account, dict) and account.get("accountNumber")
+                ]
+                if accounts:
+                    if self._accountNumber not in accounts:
+                        self._accountNumber = accounts[0]
+                    self._accounts = accounts
+                    self._accounts_fetched_at = time.time()
+                    _LOGGER.debug(f"AccountNumbers: {accounts}")
+                    self._auth_changed()
                 else:
-                    _LOGGER.error("No accounts found in the response")
+                    _LOGGER.error("Account number not found in the response")
             else:
-                _LOGGER.error(
-                    "Failed to fetch customer accounts %s", await result.text()
-                )
-
-    async def get_data(
-        self, endpoint: str, start_date: str = None, end_date: str = None
-    ):
-        """Get data from the API."""
+                _LOGGER.error("No accounts found in the response")
+        else:
+            _LOGGER.error("Failed to fetch customer accounts %s", result.body)
+
+    async def async_get_accounts(self) -> list[str]:
+        """Return all account numbers, looking them up if not known yet.
+
+        Known accounts are looked up again every ACCOUNT_DISCOVERY_INTERVAL,
+        so accounts added to the login are found without a restart. If that
+        fails, the known accounts are returned.
+        """
+        stale = time.time() >= self._accounts_fetched_at + ACCOUNT_DISCOVERY_INTERVAL
+        if not self._accounts or stale:
+            if not await self.async_ensure_token():
+                _LOGGER.error("Authentication failed - no access token obtained")
+                return self.accounts
+            await self.get_accounts()
+        return self.accounts
+
+    async def _fetch_usage(
+        self,
+        endpoint: str,
+        start_date: str = None,
+        end_date: str = None,
+        account_number: str = None,
+        headers: Mapping[str, str] = None,
+        sink: UsageStreamDecoder | None = None,
+    ) -> ApiResponse | None:
+        """Request usage, returning a 200 or 304 response or None on failure.
+
+        With a ``sink`` the body is stream-decoded into it rather than read.
+        """
         if endpoint not in [
             "halfhourly",
             "dailywithstats",
@@ -200,32 +547,157 @@ class WatercareApi:
         ]:
             raise ValueError("Invalid endpoint specified")
 
-        # If no account number, need to authenticate first
+        if not await self.async_ensure_token():
+            _LOGGER.error("Authentication failed - no access token obtained")
+            return None
+
+        # If no account number, look up the accounts for this login
         if not self._accountNumber:
-            _LOGGER.debug("No account number found, starting authentication process")
-            await self.get_refresh_token()
+            await self.get_accounts()
             if not self._accountNumber:
                 _LOGGER.error("Authentication failed - no account number obtained")
                 return None
 
-        headers = {"authorization": "Bearer " + (self._token or "")}
-
-        url = f"{self._url_base}v1/usage/{self._accountNumber}/{endpoint}"
+        account_number = account_number or self._accountNumber
+        url = f"{self._url_base}v1/usage/{account_number}/{endpoint}"
         if start_date and end_date:
             url += f"?from={start_date}&to={end_date}"
 
         _LOGGER.debug(f"Calling API URL: {url}")
 
-        jar = aiohttp.CookieJar(quote_cookie=False)
-        async with (
-            aiohttp.ClientSession(cookie_jar=jar) as session,
-            session.get(url, headers=headers) as response,
-        ):
-            if response.status == 200:
-                data = await response.text()
-                _LOGGER.debug(f"API Response status: {response.status}")
-                _LOGGER.debug(f"API Response data length: {len(data) if data else 0}")
-                return data
-            else:
-                _LOGGER.error(f"Could not fetch consumption: {response.status}")
+        for attempt in range(2):
+            request_headers = {
+                **(headers or {}),
+                "authorization": "Bearer " + (self._token or ""),
+            }
+            try:
+                with self.metrics.timer("fetch"):
+                    response = await self._request(
+                        "GET",
+                        url,
+                        read="stream" if sink else "bytes",
+                        headers=request_headers,
+                        sink=sink,
+                    )
+            except WatercareApiError as err:
+                _LOGGER.error(f"Could not fetch consumption: {err}")
                 return None
+            if response.status == 401 and attempt == 0:
+                # Token was revoked or expired early; refresh once and retry
+                _LOGGER.debug("Access token rejected, refreshing")
+                self.invalidate_access_token()
+                if not await self.async_ensure_token():
+                    return None
+                continue
+            if response.status in (200, 304):
+                _LOGGER.debug(f"API Response status: {response.status}")
+                return response
+            _LOGGER.error(f"Could not fetch consumption: {response.status}")
+            return None
+        return None
+
+    async def get_data(
+        self,
+        endpoint: str,
+        start_date: str = None,
+        end_date: str = None,
+        account_number: str = None,
+    ):
+        """Get data from the API for an account, the primary account by default."""
+        response = await self._fetch_usage(
+            endpoint, start_date, end_date, account_number
+        )
+        if response is None or response.status != 200:
+            return None
+        data = response.body.decode()
+        _LOGGER.debug(f"API Response data length: {len(data) if data else 0}")
+        return data
+
+    async def get_usage(
+        self,
+        endpoint: str,
+        start_date: str = None,
+        end_date: str = None,
+        account_number: str = None,
+    ) -> Any | None:
+        """Get decoded usage, served from the response cache where possible.
+
+        Fresh cache entries are returned without a request. Stale ones are
+        revalidated with If-None-Match/If-Modified-Since when the server sent
+        validators, and a 304 reuses the decoded payload. Returned payloads
+        are shared with the cache and must not be modified.
+        """
+        key = (account_number or self._accountNumber, endpoint, start_date, end_date)
+        entry = self.cache.get(key)
+        if self.cache.fresh(entry):
+            self.cache.hits += 1
+            _LOGGER.debug(f"Serving {endpoint} from cache")
+            return entry.payload
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self._fetch_usage(
+            endpoint, start_date, end_date, account_number, headers
+        )
+        if response is None:
+            return None
+
+        ttl = CACHE_TTLS.get(endpoint, DEFAULT_CACHE_TTL)
+        if response.status == 304 and entry is not None:
+            self.cache.revalidations += 1
+            self.cache.refresh(key, ttl)
+            _LOGGER.debug(f"{endpoint} unchanged since last fetch")
+            return entry.payload
+
+        self.cache.misses += 1
+        raw = response.body or b""
+        try:
+            with self.metrics.timer("decode"):
+                if len(raw) < EXECUTOR_DECODE_BYTES:
+                    payload = json_loads(raw)
+                else:
+                    payload = await asyncio.get_running_loop().run_in_executor(
+                        None, json_loads, raw
+                    )
+        except json.JSONDecodeError as err:
+            _LOGGER.error(f"Failed to parse Watercare API response: {err}")
+            return None
+
+        self.cache.put(
+            key,
+            payload,
+            len(raw),
+            ttl,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        return payload
+
+    async def get_usage_stream(
+        self,
+        decoder: UsageStreamDecoder,
+        endpoint: str,
+        start_date: str = None,
+        end_date: str = None,
+        account_number: str = None,
+    ) -> dict[str, Any] | None:
+        """Stream usage into a decoder without buffering the whole response.
+
+        Meant for full-range fetches that are too large to cache; the readings
+        go to the decoder's callbacks and the response cache is bypassed.
+        Returns the other top-level members of the response, or None on
+        failure.
+        """
+        # Decoding overlaps the download, so it is all timed as the fetch
+        response = await self._fetch_usage(
+            endpoint, start_date, end_date, account_number, sink=decoder
+        )
+        if response is None:
+            return None
+        _LOGGER.debug(f"Streamed {decoder.entries} {endpoint} readings")
+        return response.body
@@ -0,0 +1,183 @@
+"""Historical backfill for the Watercare integration."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+import logging
+from typing import Any
+
+from .api import WatercareApi
+from .const import (
+    API_DATE_FORMAT,
+    BACKFILL_CHUNK_DAYS,
+    BACKFILL_CONCURRENCY,
+    BACKFILL_MAX_RETRIES,
+    BACKFILL_RETRY_DELAY,
+)
+from .resilience import backoff_delay
+from .storage import WatercareStore
+
+_LOGGER = logging.getLogger(__name__)
+
+STORE_SECTION = "backfill"
+
+
+def split_range(start: date, end: date, chunk_days: int) -> list[tuple[date, date]]:
+    """Split an inclusive date range into consecutive chunks."""
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+class WatercareBackfill:
+    """Import a long date range in chunks, fetched concurrently and written in order.
+
+    Chunks are fetched with at most ``concurrency`` requests in flight and
+    retried on failure. Each decoded chunk is handed to ``async_write`` oldest
+    first, together with the state returned for the previous chunk, so running
+    sums carry across the whole range. ``async_prepare`` gives the state the
+    first chunk starts from, and ``async_finish`` is handed the final state
+    once every chunk is written. A checkpoint holding the next chunk and the
+    writer state is persisted after every chunk so an interrupted backfill
+    resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        api: WatercareApi,
+        store: WatercareStore,
+        endpoint: str,
+        async_write: Callable[[Any, dict], Awaitable[dict]],
+        account_number: str | None = None,
+        async_prepare: Callable[[date, date], Awaitable[dict]] | None = None,
+        async_finish: Callable[[dict], Awaitable[None]] | None = None,
+        chunk_days: int = BACKFILL_CHUNK_DAYS,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        max_retries: int = BACKFILL_MAX_RETRIES,
+    ):
+        """Initialise the backfill.
+
+        ``account_number`` is None for the login's primary account.
+        """
+        self._api = api
+        self._store = store
+        self._endpoint = endpoint
+        self._account_number = account_number
+        self._async_write = async_write
+        self._async_prepare = async_prepare
+        self._async_finish = async_finish
+        self._chunk_days = chunk_days
+        self._concurrency = concurrency
+        self._max_retries = max_retries
+
+    @property
+    def checkpoint(self) -> dict | None:
+        """Return the checkpoint of an unfinished backfill for this endpoint."""
+        checkpoint = self._store.get(STORE_SECTION)
+        if (
+            checkpoint
+            and checkpoint.get("endpoint") == self._endpoint
+            and checkpoint.get("account") == self._account_number
+        ):
+            return checkpoint
+        return None
+
+    async def async_start(self, start: date, end: date):
+        """Start a new backfill, replacing any unfinished one."""
+        if start > end:
+            raise ValueError("Backfill start date must not be after the end date")
+
+        state = await self._async_prepare(start, end) if self._async_prepare else {}
+        self._store.async_set(
+            STORE_SECTION,
+            {
+                "endpoint": self._endpoint,
+                "account": self._account_number,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "next_chunk": 0,
+                "state": state,
+            },
+        )
+        await self.async_resume()
+
+    async def async_resume(self):
+        """Continue an unfinished backfill from its checkpoint."""
+        checkpoint = self.checkpoint
+        if checkpoint is None:
+            return
+
+        chunks = split_range(
+            date.fromisoformat(checkpoint["start"]),
+            date.fromisoformat(checkpoint["end"]),
+            self._chunk_days,
+        )
+        next_chunk = checkpoint["next_chunk"]
+        state = checkpoint["state"]
+        _LOGGER.info(
+            f"Backfilling {self._endpoint} from {checkpoint['start']} to "
+            f"{checkpoint['end']}: chunk {next_chunk + 1} of {len(chunks)}"
+        )
+
+        # Keep a bounded window of fetches in flight ahead of the writer
+        remaining = iter(range(next_chunk, len(chunks)))
+        pending: deque[tuple[int, asyncio.Task]] = deque()
+
+        def schedule():
+            while len(pending) < self._concurrency:
+                index = next(remaining, None)
+                if index is None:
+                    return
+                task = asyncio.create_task(self._async_fetch_chunk(*chunks[index]))
+                pending.append((index, task))
+
+        schedule()
+        try:
+            while pending:
+                index, task = pending.popleft()
+                payload = await task
+                schedule()
+
+                if payload is None:
+                    _LOGGER.error(
+                        f"Backfill stopped at chunk {index + 1} of {len(chunks)}; "
+                        "it will resume from there next time"
+                    )
+                    return
+
+                state = await self._async_write(payload, state)
+                checkpoint = {**checkpoint, "next_chunk": index + 1, "state": state}
+                self._store.async_set(STORE_SECTION, checkpoint)
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+        # A failure here keeps the checkpoint, so only this step is retried
+        if self._async_finish:
+            await self._async_finish(state)
+        _LOGGER.info(f"Backfill of {self._endpoint} complete")
+        self._store.async_set(STORE_SECTION, None)
+
+    async def _async_fetch_chunk(self, start: date, end: date) -> Any | None:
+        """Fetch and decode one chunk, retrying with backoff on failure."""
+        for attempt in range(self._max_retries + 1):
+            payload = await self._api.get_usage(
+                self._endpoint,
+                start.strftime(API_DATE_FORMAT),
+                end.strftime(API_DATE_FORMAT),
+                self._account_number,
+            )
+            if payload is not None:
+                return payload
+
+            if attempt < self._max_retries:
+                delay = backoff_delay(attempt, BACKFILL_RETRY_DELAY)
+                _LOGGER.debug(f"Retrying backfill chunk {start} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        return None
@@ -0,0 +1,107 @@
+"""In-memory cache of decoded Watercare API responses."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# How long a response is served without asking the server again, by endpoint.
+# Smart meter readings arrive a few times a day; billing periods monthly.
+CACHE_TTLS = {
+    "halfhourly": 30 * 60,
+    "dailywithstats": 60 * 60,
+    "monthly": 6 * 3600,
+    "mechanicalmonthly": 12 * 3600,
+}
+DEFAULT_CACHE_TTL = 30 * 60
+# Upper bound on the summed size of cached response bodies
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    """A decoded response with its validators for conditional requests."""
+
+    payload: Any
+    size: int
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class ResponseCache:
+    """LRU cache of decoded responses, bounded by total body size.
+
+    Entries stay after their TTL so they can be revalidated with ETag or
+    Last-Modified; eviction only happens when the size bound is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        """Initialise an empty cache."""
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._size = 0
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> CacheEntry | None:
+        """Return the entry for a key, fresh or stale, marking it recently used."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def fresh(self, entry: CacheEntry | None) -> bool:
+        """Return True if an entry can be served without a request."""
+        return entry is not None and time.time() < entry.expires_at
+
+    def put(
+        self,
+        key: tuple,
+        payload: Any,
+        size: int,
+        ttl: float,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        """Store a decoded response, evicting the least recently used entries."""
+        self.discard(key)
+        if size > self._max_bytes:
+            return
+        self._entries[key] = CacheEntry(
+            payload, size, time.time() + ttl, etag, last_modified
+        )
+        self._size += size
+        while self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    def refresh(self, key: tuple, ttl: float):
+        """Extend an entry after the server confirmed it is unchanged."""
+        if (entry := self._entries.get(key)) is not None:
+            entry.expires_at = time.time() + ttl
+
+    def discard(self, key: tuple):
+        """Remove an entry if present."""
+        if (entry := self._entries.pop(key, None)) is not None:
+            self._size -= entry.size
+
+    def clear(self):
+        """Remove every entry."""
+        self._entries.clear()
+        self._size = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return cache statistics for diagnostics."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+        }
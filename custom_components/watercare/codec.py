@@ -0,0 +1,16 @@
+"""JSON decoding for Watercare API responses."""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    # Home Assistant ships orjson, but keep working without it
+    orjson = None
+
+# Name of the backend in use, reported in diagnostics and the benchmark
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# Decode JSON from bytes or str; orjson parses bytes without an intermediate
+# str, and both raise a json.JSONDecodeError subclass on malformed input
+json_loads = orjson.loads if orjson is not None else json.loads
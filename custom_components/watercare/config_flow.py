@@ -1,10 +1,13 @@
 """Config flow for Watercare integration."""
 
+from datetime import datetime
 import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.selector import DateSelector
 
 from .const import (
     DOMAIN,
@@ -13,12 +16,15 @@ from .const import (
     CONF_WASTEWATER_RATIO,
     CONF_ANNUAL_LINE_CHARGE,
     CONF_ENDPOINT,
+    CONF_ENDPOINTS,
+    CONF_RATES_EFFECTIVE_FROM,
     DEFAULT_CONSUMPTION_RATE,
     DEFAULT_WASTEWATER_RATE,
     DEFAULT_WASTEWATER_RATIO,
     DEFAULT_ANNUAL_LINE_CHARGE,
     DEFAULT_ENDPOINT,
     ENDPOINT_OPTIONS,
+    NZ_TIMEZONE,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -28,6 +34,7 @@ DATA_SCHEMA = vol.Schema(
         vol.Required(CONF_USERNAME): str,
         vol.Required(CONF_PASSWORD): str,
         vol.Optional(CONF_ENDPOINT, default=DEFAULT_ENDPOINT): vol.In(ENDPOINT_OPTIONS),
+        vol.Optional(CONF_ENDPOINTS, default=[]): cv.multi_select(ENDPOINT_OPTIONS),
         vol.Optional(
             CONF_CONSUMPTION_RATE, default=DEFAULT_CONSUMPTION_RATE
         ): vol.Coerce(float),
@@ -44,6 +51,13 @@ DATA_SCHEMA = vol.Schema(
 )
 
 
+def _endpoints(user_input) -> list[str]:
+    """Return the primary endpoint followed by any additional ones selected."""
+    primary = user_input.get(CONF_ENDPOINT, DEFAULT_ENDPOINT)
+    additional = user_input.get(CONF_ENDPOINTS, [])
+    return [primary, *(endpoint for endpoint in additional if endpoint != primary)]
+
+
 class WatercareConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Watercare."""
 
@@ -63,6 +77,7 @@ class WatercareConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_USERNAME: user_input[CONF_USERNAME],
                 CONF_PASSWORD: user_input[CONF_PASSWORD],
                 CONF_ENDPOINT: user_input.get(CONF_ENDPOINT, DEFAULT_ENDPOINT),
+                CONF_ENDPOINTS: _endpoints(user_input),
                 CONF_CONSUMPTION_RATE: user_input.get(
                     CONF_CONSUMPTION_RATE, DEFAULT_CONSUMPTION_RATE
                 ),
@@ -93,7 +108,11 @@ class WatercareOptionsFlowHandler(config_entries.OptionsFlowWithConfigEntry):
     async def async_step_init(self, user_input=None):
         """Manage the options."""
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            return self.async_create_entry(
+                title="", data={**user_input, CONF_ENDPOINTS: _endpoints(user_input)}
+            )
+
+        config = {**self.config_entry.data, **self.config_entry.options}
 
         return self.async_show_form(
             step_id="init",
@@ -101,34 +120,47 @@ class WatercareOptionsFlowHandler(config_entries.OptionsFlowWithConfigEntry):
                 {
                     vol.Optional(
                         CONF_ENDPOINT,
-                        default=self.config_entry.data.get(
-                            CONF_ENDPOINT, DEFAULT_ENDPOINT
-                        ),
+                        default=config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT),
                     ): vol.In(ENDPOINT_OPTIONS),
+                    vol.Optional(
+                        CONF_ENDPOINTS,
+                        default=config.get(CONF_ENDPOINTS, [])[1:],
+                    ): cv.multi_select(ENDPOINT_OPTIONS),
                     vol.Optional(
                         CONF_CONSUMPTION_RATE,
-                        default=self.config_entry.data.get(
+                        default=config.get(
                             CONF_CONSUMPTION_RATE, DEFAULT_CONSUMPTION_RATE
                         ),
                     ): vol.Coerce(float),
                     vol.Optional(
                         CONF_WASTEWATER_RATE,
-                        default=self.config_entry.data.get(
+                        default=config.get(
                             CONF_WASTEWATER_RATE, DEFAULT_WASTEWATER_RATE
                         ),
                     ): vol.Coerce(float),
                     vol.Optional(
                         CONF_WASTEWATER_RATIO,
-                        default=self.config_entry.data.get(
+                        default=config.get(
                             CONF_WASTEWATER_RATIO, DEFAULT_WASTEWATER_RATIO
                         ),
                     ): vol.Coerce(float),
                     vol.Optional(
                         CONF_ANNUAL_LINE_CHARGE,
-                        default=self.config_entry.data.get(
+                        default=config.get(
                             CONF_ANNUAL_LINE_CHARGE, DEFAULT_ANNUAL_LINE_CHARGE
                         ),
                     ): vol.Coerce(float),
+                    # New rates apply from this date and earlier usage keeps the
+                    # rates that applied then; without a date they replace the
+                    # rates used before the first dated change
+                    vol.Optional(
+                        CONF_RATES_EFFECTIVE_FROM,
+                        description={
+                            "suggested_value": datetime.now(NZ_TIMEZONE)
+                            .date()
+                            .isoformat()
+                        },
+                    ): DateSelector(),
                 }
             ),
         )
@@ -1,5 +1,7 @@
 """Constants for Watercare integration."""
 
+from datetime import timedelta
+
 from homeassistant.const import Platform
 import pytz
 
@@ -13,7 +15,9 @@ CONF_CONSUMPTION_RATE = "consumption_rate"
 CONF_WASTEWATER_RATE = "wastewater_rate"
 CONF_WASTEWATER_RATIO = "wastewater_ratio"
 CONF_ANNUAL_LINE_CHARGE = "annual_line_charge"
+CONF_RATES_EFFECTIVE_FROM = "rates_effective_from"
 CONF_ENDPOINT = "endpoint"
+CONF_ENDPOINTS = "endpoints"
 
 # Default cost rate per 1000L (NZD) - typical NZ Watercare rates
 DEFAULT_CONSUMPTION_RATE = 2.296  # $2.296 per 1000L
@@ -22,6 +26,53 @@ DEFAULT_WASTEWATER_RATIO = 0.785  # 78.50% of water usage is wastewater
 DEFAULT_ANNUAL_LINE_CHARGE = 310  # $310 per annum
 DEFAULT_ENDPOINT = "halfhourly"
 
+# Interval until the first poll; later polls are scheduled adaptively
+SCAN_INTERVAL = timedelta(hours=12)
+
+# Adaptive polling, by meter kind: (shortest interval, longest backoff while
+# data is unchanged, longest wait for the next expected arrival)
+POLL_INTERVALS = {
+    "smart": (timedelta(minutes=30), timedelta(hours=4), timedelta(hours=12)),
+    "billing": (timedelta(hours=12), timedelta(days=2), timedelta(days=2)),
+}
+# Arrival times remembered per endpoint, and needed before a window is used
+POLL_ARRIVAL_HISTORY = 14
+POLL_ARRIVAL_MIN_OBSERVATIONS = 3
+# Minimum half-width of the polling window around the usual arrival time
+POLL_ARRIVAL_WINDOW = timedelta(minutes=45)
+# An endpoint is polled when an update runs this close to its next poll
+POLL_DUE_MARGIN = timedelta(minutes=1)
+
+# Incremental fetching: re-request this much before the newest stored reading
+# so late-arriving readings are picked up
+INCREMENTAL_OVERLAP = timedelta(days=2)
+API_DATE_FORMAT = "%Y-%m-%d"
+
+# Statistics rows this close to the newest one are remembered, so a poll
+# that re-imports them unchanged can skip the recorder write
+STATISTICS_DIGEST_WINDOW = timedelta(days=7)
+
+# Payloads with at least this many readings, or batches with this many
+# buckets, are processed in the executor rather than on the event loop
+EXECUTOR_THRESHOLD = 2000
+
+# Raw readings appended since the last compaction of a reading file before
+# it is compacted again
+READINGS_COMPACT_RECORDS = 4096
+
+# Historical backfill
+BACKFILL_CHUNK_DAYS = 30
+BACKFILL_CONCURRENCY = 4
+BACKFILL_MAX_RETRIES = 3
+BACKFILL_RETRY_DELAY = 5  # seconds, doubled on each retry
+# How far before a backfill's start to look for the statistics row its sums
+# continue from; a year covers the longest billing period
+BACKFILL_SEED_LOOKBACK = timedelta(days=370)
+SERVICE_BACKFILL = "backfill"
+
+# Endpoints that return billing periods rather than a usage series
+BILLING_PERIOD_ENDPOINTS = ["mechanicalmonthly", "monthly"]
+
 # Available API endpoints
 ENDPOINT_OPTIONS = {
     "mechanicalmonthly": "Monthly Billing Periods (Non-Smart Meters)",
@@ -38,6 +89,15 @@ ENDPOINT_DISPLAY_NAMES = {
     "halfhourly": "Half-hourly",
 }
 
+# Rolling windows of usage and cost with sensors of their own
+USAGE_WINDOWS = {
+    "last_24_hours": "Last 24 Hours",
+    "last_7_days": "Last 7 Days",
+    "last_30_days": "Last 30 Days",
+    "billing_period_to_date": "Billing Period to Date",
+    "same_period_last_year": "Same Period Last Year",
+}
+
 # Statistic type names
 STATISTIC_TYPES = {
     "consumption": "Consumption",
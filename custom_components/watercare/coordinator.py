@@ -0,0 +1,352 @@
+"""Data update coordinator for the Watercare integration."""
+
+import asyncio
+from dataclasses import asdict
+from datetime import datetime
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import WatercareApi
+from .const import (
+    BILLING_PERIOD_ENDPOINTS,
+    CONF_ANNUAL_LINE_CHARGE,
+    CONF_CONSUMPTION_RATE,
+    CONF_ENDPOINT,
+    CONF_ENDPOINTS,
+    CONF_RATES_EFFECTIVE_FROM,
+    CONF_WASTEWATER_RATE,
+    CONF_WASTEWATER_RATIO,
+    DEFAULT_ANNUAL_LINE_CHARGE,
+    DEFAULT_CONSUMPTION_RATE,
+    DEFAULT_ENDPOINT,
+    DEFAULT_WASTEWATER_RATE,
+    DEFAULT_WASTEWATER_RATIO,
+    DOMAIN,
+    NZ_TIMEZONE,
+    SCAN_INTERVAL,
+)
+from .parsing import nz_day, nz_day_start, parse_timestamp
+from .planner import StatisticsWritePlanner
+from .processor import WatercareData, WatercareEndpointProcessor
+from .readings import ReadingStore, readings_path
+from .scheduler import WatercareScheduler
+from .storage import WatercareStore
+from .tariff import Tariff, async_load_tariffs
+
+_LOGGER = logging.getLogger(__name__)
+
+# The last processed data of every account and endpoint
+STORE_SECTION = "data"
+
+
+def configured_endpoints(config) -> list[str]:
+    """Return the selected endpoints, primary first, from entry data and options."""
+    primary = config.get(CONF_ENDPOINT, DEFAULT_ENDPOINT)
+    endpoints = [primary]
+    for endpoint in config.get(CONF_ENDPOINTS) or []:
+        if endpoint not in endpoints:
+            endpoints.append(endpoint)
+
+    # Both billing endpoints write the same statistic ids, and a meter is
+    # either mechanical or smart, so only the first one selected is kept
+    billing = [e for e in endpoints if e in BILLING_PERIOD_ENDPOINTS]
+    for endpoint in billing[1:]:
+        _LOGGER.warning(f"Ignoring endpoint {endpoint}; {billing[0]} is selected")
+        endpoints.remove(endpoint)
+    return endpoints
+
+
+class WatercareDataUpdateCoordinator(
+    DataUpdateCoordinator[dict[tuple[str, str], WatercareData]]
+):
+    """Fetch and process Watercare usage once per update for all entities.
+
+    Data is keyed by ``(account number, endpoint)``. Every account under the
+    login is discovered on the first update, and the selected endpoints of
+    all accounts that are due to be polled are fetched concurrently with one
+    token and session.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api: WatercareApi,
+        store: WatercareStore,
+    ):
+        """Initialise the coordinator."""
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+
+        self._api = api
+        self._store = store
+        self._entry_id = entry.entry_id
+        self.metrics = api.metrics
+
+        # Get rates and endpoints from config entry data, then any updated options
+        config = {**entry.data, **entry.options}
+        self.endpoints = configured_endpoints(config)
+        # Earlier rates are kept in the store and still apply to earlier usage
+        self.tariffs = async_load_tariffs(
+            store,
+            Tariff(
+                effective_from=config.get(CONF_RATES_EFFECTIVE_FROM) or "",
+                consumption_rate=config.get(
+                    CONF_CONSUMPTION_RATE, DEFAULT_CONSUMPTION_RATE
+                ),
+                wastewater_rate=config.get(
+                    CONF_WASTEWATER_RATE, DEFAULT_WASTEWATER_RATE
+                ),
+                wastewater_ratio=config.get(
+                    CONF_WASTEWATER_RATIO, DEFAULT_WASTEWATER_RATIO
+                ),
+                annual_line_charge=config.get(
+                    CONF_ANNUAL_LINE_CHARGE, DEFAULT_ANNUAL_LINE_CHARGE
+                ),
+            ),
+        )
+        self.accounts: list[str] = []
+        self.processors: dict[tuple[str, str], WatercareEndpointProcessor] = {}
+        self._scheduler = WatercareScheduler(store)
+        self.planner = StatisticsWritePlanner(store)
+        # Accounts and endpoints whose data was restored and not yet refreshed
+        self.stale: set[tuple[str, str]] = set()
+        self._backfill_task = None
+        self._start_task = None
+        # Held by an update or a backfill, which write the same statistics
+        self._update_lock = asyncio.Lock()
+
+    def async_restore(self) -> bool:
+        """Restore the accounts and last data saved before a restart.
+
+        Returns True if there was data to restore, in which case entities can
+        be set up before the first update.
+        """
+        data = {}
+        for item in self._store.get(STORE_SECTION) or []:
+            try:
+                data[(item["account"], item["endpoint"])] = WatercareData(
+                    **item["data"]
+                )
+            except (KeyError, TypeError):
+                continue
+        accounts = self._api.accounts
+        if not accounts or not data:
+            return False
+
+        self._add_processors(accounts)
+        self.data = {
+            key: value for key, value in data.items() if key in self.processors
+        }
+        self.stale = set(self.data)
+        _LOGGER.debug(f"Restored data for {list(self.data)}")
+        return True
+
+    @callback
+    def async_start(self, _hass: HomeAssistant | None = None):
+        """Run the first update and resume any backfill in the background.
+
+        Called once Home Assistant has started, so neither the login nor the
+        statistics imports hold up startup.
+        """
+        self._start_task = self.hass.async_create_background_task(
+            self._async_start(), f"{DOMAIN} first update"
+        )
+
+    async def _async_start(self):
+        """Run the first update, then resume any backfill."""
+        await self.async_refresh()
+        self.async_resume_backfill()
+
+    async def _async_discover_accounts(self):
+        """Create processors for every account and endpoint not yet known."""
+        accounts = await self._api.async_get_accounts()
+        if not accounts:
+            raise UpdateFailed("No Watercare accounts found for this login")
+        self._add_processors(accounts)
+
+    def _add_processors(self, accounts: list[str]):
+        """Create processors for the accounts' endpoints not yet known."""
+        for account in accounts:
+            if account not in self.accounts:
+                self.accounts.append(account)
+            for endpoint in self.endpoints:
+                if (account, endpoint) in self.processors:
+                    continue
+                readings = None
+                if endpoint not in BILLING_PERIOD_ENDPOINTS:
+                    readings = ReadingStore(
+                        readings_path(self.hass, self._entry_id, account, endpoint)
+                    )
+                self.processors[(account, endpoint)] = WatercareEndpointProcessor(
+                    self.hass,
+                    self._api,
+                    self._store,
+                    endpoint,
+                    self.tariffs,
+                    account_number=account,
+                    primary=account == self.accounts[0],
+                    metrics=self.metrics,
+                    planner=self.planner,
+                    readings=readings,
+                )
+
+    def async_resume_backfill(self):
+        """Resume an interrupted backfill in the background."""
+        for processor in self.processors.values():
+            if processor.backfill.checkpoint is not None:
+                self._start_backfill_task(processor.backfill.async_resume())
+                return
+
+    async def async_shutdown(self):
+        """Stop a running backfill and compact the reading files.
+
+        The backfill checkpoint is kept for next time.
+        """
+        await super().async_shutdown()
+        if self._start_task and not self._start_task.done():
+            self._start_task.cancel()
+        if self._backfill_task and not self._backfill_task.done():
+            self._backfill_task.cancel()
+        for processor in self.processors.values():
+            if processor.readings is not None and processor.readings.loaded:
+                try:
+                    await self.hass.async_add_executor_job(processor.readings.compact)
+                except OSError as err:
+                    _LOGGER.warning(f"Failed to compact readings: {err}")
+
+    def _start_backfill_task(self, coro):
+        """Run a backfill in the background once no update is running."""
+        self._backfill_task = self.hass.async_create_background_task(
+            self._async_run_backfill(coro), f"{DOMAIN} backfill"
+        )
+
+    async def _async_run_backfill(self, coro):
+        """Run a backfill while holding the update lock."""
+        try:
+            async with self._update_lock:
+                await coro
+        finally:
+            # Cancelled while waiting for the lock, the backfill never started
+            coro.close()
+
+    async def async_backfill(
+        self, start_date, end_date=None, endpoint=None, account_number=None
+    ):
+        """Import history between the given dates for one account's endpoint.
+
+        Raises HomeAssistantError for a range that cannot be backfilled.
+        """
+        today = datetime.now(NZ_TIMEZONE).date()
+        end_date = end_date or today
+        if start_date > end_date:
+            raise HomeAssistantError(
+                f"Backfill start date {start_date} is after the end date {end_date}"
+            )
+        if start_date > today:
+            raise HomeAssistantError(
+                f"Backfill start date {start_date} is in the future"
+            )
+        if self._backfill_task and not self._backfill_task.done():
+            _LOGGER.warning("A backfill is already running")
+            return
+        if not account_number and not self.accounts:
+            _LOGGER.error("No Watercare accounts are known yet to backfill")
+            return
+        key = (account_number or self.accounts[0], endpoint or self.endpoints[0])
+        processor = self.processors.get(key)
+        if processor is None:
+            _LOGGER.error(f"Endpoint {key[1]} of account {key[0]} cannot be backfilled")
+            return
+        self._start_backfill_task(processor.backfill.async_start(start_date, end_date))
+
+    def _billing_period_start(self, account: str, now: float) -> float | None:
+        """Return the start of an account's current billing period, if known.
+
+        It comes from the latest billing period last fetched for the account;
+        once that period has ended, the next one starts the day after.
+        """
+        for (data_account, endpoint), data in (self.data or {}).items():
+            if data_account != account or endpoint not in BILLING_PERIOD_ENDPOINTS:
+                continue
+            try:
+                period_from = parse_timestamp(data.attributes["billing_period_from"])
+                period_to = parse_timestamp(data.attributes["billing_period_to"])
+            except (KeyError, TypeError, ValueError):
+                return None
+            next_start = nz_day_start(nz_day(period_to) + 1).timestamp()
+            return next_start if next_start <= now else float(period_from)
+        return None
+
+    async def _async_update_data(self) -> dict[tuple[str, str], WatercareData]:
+        """Fetch and process the latest usage for every account and endpoint."""
+        if self._backfill_task and not self._backfill_task.done():
+            # The backfill rewrites the same statistics up to today
+            _LOGGER.debug("Backfill in progress, skipping update")
+            return self.data
+
+        async with self._update_lock:
+            with self.metrics.timer("update"):
+                return await self._async_update_all()
+
+    async def _async_update_all(self) -> dict[tuple[str, str], WatercareData]:
+        """Update every account and endpoint concurrently."""
+        await self._async_discover_accounts()
+
+        started = dt_util.utcnow()
+        # Each endpoint is polled on its own schedule; until it is due, it keeps
+        # the data of its last update since the restart
+        due = {
+            key: processor
+            for key, processor in self.processors.items()
+            if self._scheduler.due(key[1], started)
+            or key not in (self.data or {})
+            or key in self.stale
+        }
+        for (account, _), processor in due.items():
+            processor.billing_period_start = self._billing_period_start(
+                account, started.timestamp()
+            )
+
+        results = await asyncio.gather(
+            *(processor.async_update() for processor in due.values()),
+            return_exceptions=True,
+        )
+
+        data = dict(self.data or {})
+        errors = []
+        changed = {}
+        for key, result in zip(due, results):
+            account, endpoint = key
+            if isinstance(result, UpdateFailed):
+                _LOGGER.warning(f"Update of {endpoint} for {account} failed: {result}")
+                errors.append(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                data[key] = result
+                self.stale.discard(key)
+                changed[endpoint] = (
+                    changed.get(endpoint, False) or self.processors[key].advanced
+                )
+
+        if errors and len(errors) == len(results):
+            raise errors[0]
+
+        now = dt_util.utcnow()
+        for endpoint, endpoint_changed in changed.items():
+            self._scheduler.record(endpoint, endpoint_changed, now)
+        self.update_interval = self._scheduler.next_interval(self.endpoints, now)
+
+        self._store.async_set(
+            STORE_SECTION,
+            [
+                {"account": account, "endpoint": endpoint, "data": asdict(value)}
+                for (account, endpoint), value in data.items()
+            ],
+        )
+        return data
@@ -0,0 +1,59 @@
+"""Diagnostics support for the Watercare integration."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
+
+from .codec import JSON_BACKEND
+from .const import DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, "email"}
+
+
+def _redact_accounts(statistic_id: str, accounts: list[str]) -> str:
+    """Replace the account number in a statistic id with its position."""
+    for index, account in enumerate(accounts):
+        suffix = f"_{slugify(account)}"
+        if statistic_id.endswith(suffix):
+            return f"{statistic_id[: -len(suffix)]}_account_{index + 1}"
+    return statistic_id
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    api = entry_data["api"]
+    coordinator = entry_data["coordinator"]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "circuit_breaker": api.breaker.as_dict(),
+        "response_cache": api.cache.as_dict(),
+        "metrics": api.metrics.as_dict(),
+        "json_backend": JSON_BACKEND,
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "accounts": len(coordinator.accounts),
+            "endpoints": coordinator.endpoints,
+            "tariffs": coordinator.tariffs.as_list(),
+            # Account numbers are left out
+            "remembered_statistics_rows": {
+                _redact_accounts(statistic_id, coordinator.accounts): rows
+                for statistic_id, rows in coordinator.planner.as_dict().items()
+            },
+            "stored_readings": [
+                {"endpoint": endpoint, "readings": len(processor.readings)}
+                for (_, endpoint), processor in coordinator.processors.items()
+                if processor.readings is not None
+            ],
+        },
+    }
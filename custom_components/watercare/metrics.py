@@ -0,0 +1,107 @@
+"""Timing and counters for the phases of a Watercare update."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import time
+from typing import Any
+
+import aiohttp
+
+
+@dataclass
+class PhaseTiming:
+    """Durations in seconds recorded for one phase."""
+
+    count: int = 0
+    total: float = 0.0
+    last: float | None = None
+    max: float = 0.0
+
+    def add(self, duration: float):
+        """Record one duration."""
+        self.count += 1
+        self.total += duration
+        self.last = duration
+        self.max = max(self.max, duration)
+
+
+class WatercareMetrics:
+    """Monotonic phase timers and counters shared by the API and processors.
+
+    Phases include login, token_refresh, fetch, decode, aggregate,
+    readings, statistics_import and update, plus dns, connect and ttfb from
+    the aiohttp trace hooks. Counters include requests, retries,
+    bytes_downloaded, readings_stored, rows_written and rows_skipped.
+    """
+
+    def __init__(self):
+        """Initialise empty metrics."""
+        self.phases: dict[str, PhaseTiming] = {}
+        self.counters: dict[str, int] = {}
+
+    def record(self, phase: str, duration: float):
+        """Record a duration for a phase."""
+        self.phases.setdefault(phase, PhaseTiming()).add(duration)
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Time the enclosed block as one occurrence of a phase."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(phase, time.monotonic() - start)
+
+    def increment(self, counter: str, amount: int = 1):
+        """Add to a counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def last(self, phase: str) -> float | None:
+        """Return the latest duration of a phase, if any."""
+        timing = self.phases.get(phase)
+        return timing.last if timing else None
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return aiohttp trace hooks recording DNS, connect and TTFB times."""
+
+        async def on_request_start(session, trace_config_ctx, params):
+            trace_config_ctx.request_start = time.monotonic()
+
+        async def on_dns_start(session, trace_config_ctx, params):
+            trace_config_ctx.dns_start = time.monotonic()
+
+        async def on_dns_end(session, trace_config_ctx, params):
+            start = getattr(trace_config_ctx, "dns_start", None)
+            if start is not None:
+                self.record("dns", time.monotonic() - start)
+
+        async def on_connect_start(session, trace_config_ctx, params):
+            trace_config_ctx.connect_start = time.monotonic()
+
+        async def on_connect_end(session, trace_config_ctx, params):
+            start = getattr(trace_config_ctx, "connect_start", None)
+            if start is not None:
+                self.record("connect", time.monotonic() - start)
+
+        async def on_request_end(session, trace_config_ctx, params):
+            # Fired once the response headers have arrived
+            start = getattr(trace_config_ctx, "request_start", None)
+            if start is not None:
+                self.record("ttfb", time.monotonic() - start)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_connection_create_start.append(on_connect_start)
+        trace_config.on_connection_create_end.append(on_connect_end)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all timings and counters for diagnostics."""
+        return {
+            "phases": {name: asdict(timing) for name, timing in self.phases.items()},
+            "counters": dict(self.counters),
+        }
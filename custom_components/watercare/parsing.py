@@ -0,0 +1,182 @@
+"""Fast timestamp parsing for Watercare usage payloads.
+
+Usage payloads contain one ``2024-01-01T11:00:00.000Z`` style timestamp per
+reading, so parsing dominates processing time on large payloads. These helpers
+work in integer epoch seconds and return day and hour bucket keys as integers,
+only building ``datetime`` objects for the buckets that are written out.
+"""
+
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+
+from .const import NZ_TIMEZONE
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_DAY = 86400
+_HOUR = 3600
+
+NZST_OFFSET = 12 * _HOUR
+NZDT_OFFSET = 13 * _HOUR
+
+# Years covered by the precomputed Pacific/Auckland transition table. The
+# current rules (last Sunday of September to first Sunday of April) apply
+# from 2007; anything outside the table falls back to the tz database.
+_TABLE_FIRST_YEAR = 2007
+_TABLE_LAST_YEAR = 2100
+
+_utc_day_starts: dict[str, int] = {}
+_day_offsets: dict[int, tuple[int, int, int]] = {}
+
+
+def _utc_epoch(day: date, hour: int) -> int:
+    """Return epoch seconds for a UTC date and hour."""
+    return (day.toordinal() - _EPOCH_ORDINAL) * _DAY + hour * _HOUR
+
+
+def _build_transition_table() -> tuple[list[int], list[int]]:
+    """Return UTC transition times and the NZ offset in effect from each."""
+    times = []
+    offsets = []
+    for year in range(_TABLE_FIRST_YEAR, _TABLE_LAST_YEAR + 1):
+        if year > _TABLE_FIRST_YEAR:
+            # Ends 03:00 NZDT on the first Sunday of April, 14:00 UTC Saturday
+            april = date(year, 4, 1)
+            first_sunday = april + timedelta(days=(6 - april.weekday()) % 7)
+            times.append(_utc_epoch(first_sunday - timedelta(days=1), 14))
+            offsets.append(NZST_OFFSET)
+
+        # Starts 02:00 NZST on the last Sunday of September, 14:00 UTC Saturday
+        september = date(year, 9, 30)
+        last_sunday = september - timedelta(days=(september.weekday() + 1) % 7)
+        times.append(_utc_epoch(last_sunday - timedelta(days=1), 14))
+        offsets.append(NZDT_OFFSET)
+    return times, offsets
+
+
+_TRANSITION_TIMES, _TRANSITION_OFFSETS = _build_transition_table()
+_TABLE_START = _TRANSITION_TIMES[0]
+_TABLE_END = _TRANSITION_TIMES[-1]
+
+
+def parse_timestamp(value: str) -> int:
+    """Return UTC epoch seconds for an API timestamp.
+
+    The common ``YYYY-MM-DDTHH:MM:SS(.fff)Z`` form is parsed by slicing, with
+    the epoch of each date cached. Other ISO 8601 forms go through
+    ``datetime.fromisoformat``. Raises ``ValueError`` for invalid input.
+    """
+    if len(value) >= 20 and value[10] == "T" and value[-1] == "Z":
+        day = value[:10]
+        day_start = _utc_day_starts.get(day)
+        if day_start is None:
+            day_start = (date.fromisoformat(day).toordinal() - _EPOCH_ORDINAL) * _DAY
+            _utc_day_starts[day] = day_start
+        return (
+            day_start
+            + int(value[11:13]) * _HOUR
+            + int(value[14:16]) * 60
+            + int(value[17:19])
+        )
+
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _tz_database_offset(epoch: int) -> int:
+    """Return the NZ UTC offset from the tz database."""
+    moment = datetime.fromtimestamp(epoch, timezone.utc).astimezone(NZ_TIMEZONE)
+    return int(moment.utcoffset().total_seconds())
+
+
+def _offsets_for_day(utc_day: int) -> tuple[int, int, int]:
+    """Return the offset at the start of a UTC day, and when and to what it changes."""
+    start = utc_day * _DAY
+    end = start + _DAY
+    if start < _TABLE_START or end > _TABLE_END:
+        before = _tz_database_offset(start)
+        after = _tz_database_offset(end - 1)
+        if before == after:
+            return before, end, after
+        # Rare for historical dates; locate the change to the hour
+        change = next(
+            t for t in range(start, end, _HOUR) if _tz_database_offset(t) == after
+        )
+        return before, change, after
+
+    index = bisect_right(_TRANSITION_TIMES, start) - 1
+    before = _TRANSITION_OFFSETS[index]
+    change = _TRANSITION_TIMES[index + 1]
+    if change < end:
+        return before, change, _TRANSITION_OFFSETS[index + 1]
+    return before, end, before
+
+
+def nz_utc_offset(epoch: int) -> int:
+    """Return the Pacific/Auckland UTC offset in seconds at a UTC epoch."""
+    utc_day = epoch // _DAY
+    offsets = _day_offsets.get(utc_day)
+    if offsets is None:
+        offsets = _offsets_for_day(utc_day)
+        _day_offsets[utc_day] = offsets
+    before, change, after = offsets
+    return before if epoch < change else after
+
+
+def nz_day(epoch: int) -> int:
+    """Return the NZ calendar day of a UTC epoch, as days since 1970-01-01."""
+    return (epoch + nz_utc_offset(epoch)) // _DAY
+
+
+def utc_hour(epoch: int) -> int:
+    """Return the hour bucket of a UTC epoch, as hours since the epoch.
+
+    NZ offsets are whole hours, so UTC hours are also local hours, and the
+    hour repeated when daylight saving ends maps to two distinct buckets.
+    """
+    return epoch // _HOUR
+
+
+def nz_day_start(day: int) -> datetime:
+    """Return the UTC start of an NZ calendar day from ``nz_day``."""
+    # Transitions happen at 2-3am local, so the offset just after midnight
+    # applies to midnight itself
+    midnight = day * _DAY - NZST_OFFSET
+    return datetime.fromtimestamp(
+        midnight - nz_utc_offset(midnight) + NZST_OFFSET, timezone.utc
+    )
+
+
+def hour_start(hour: int) -> datetime:
+    """Return the UTC start of an hour bucket from ``utc_hour``."""
+    return datetime.fromtimestamp(hour * _HOUR, timezone.utc)
+
+
+def nz_day_to_date(day: int) -> date:
+    """Return the calendar date of an NZ day from ``nz_day``."""
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def date_to_nz_day(value: date) -> int:
+    """Return the ``nz_day`` key of a calendar date."""
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def nz_month_start(epoch: float) -> float:
+    """Return the start of the NZ calendar month containing ``epoch``."""
+    first = nz_day_to_date(nz_day(int(epoch))).replace(day=1)
+    return nz_day_start(date_to_nz_day(first)).timestamp()
+
+
+def nz_year_earlier(epoch: float) -> float:
+    """Return the same NZ date and time of day a year before ``epoch``."""
+    day = nz_day(int(epoch))
+    since_midnight = epoch - nz_day_start(day).timestamp()
+    value = nz_day_to_date(day)
+    try:
+        earlier = value.replace(year=value.year - 1)
+    except ValueError:
+        # 29 February falls back to the 28th
+        earlier = value.replace(year=value.year - 1, day=28)
+    return nz_day_start(date_to_nz_day(earlier)).timestamp() + since_midnight
@@ -0,0 +1,91 @@
+"""Planning of statistics imports so unchanged rows are not rewritten."""
+
+from collections.abc import Sequence
+import hashlib
+import logging
+
+from homeassistant.components.recorder.models import StatisticData
+
+from .const import STATISTICS_DIGEST_WINDOW
+from .storage import WatercareStore
+
+_LOGGER = logging.getLogger(__name__)
+
+STORE_SECTION = "statistics_digests"
+
+
+def _row_digest(start: int, row: StatisticData) -> str:
+    """Return a short digest of a statistics row's content."""
+    content = f"{start}|{row.get('sum')!r}"
+    return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+
+
+class StatisticsWritePlanner:
+    """Remember what was last imported for each statistic and drop repeats.
+
+    For each statistic id a digest of every recently imported row is kept,
+    keyed by the row's start time, and persisted across restarts. Rows whose
+    digest matches are left out of the next import, so a poll that finds no
+    new readings imports nothing. Only digests within STATISTICS_DIGEST_WINDOW
+    of the newest row are kept; older rows are only written again by a
+    backfill, and then always are.
+    """
+
+    def __init__(self, store: WatercareStore):
+        """Initialise the planner from the persisted digests."""
+        self._store = store
+        self._digests: dict[str, dict[str, str]] = {
+            statistic_id: dict(rows)
+            for statistic_id, rows in (store.get(STORE_SECTION) or {}).items()
+        }
+
+    def plan(
+        self,
+        statistic_id: str,
+        rows: Sequence[StatisticData],
+        stored_until: float | None,
+    ) -> list[StatisticData]:
+        """Return the rows that are new or changed, and record them as imported.
+
+        ``rows`` must be oldest first.
+        ``stored_until`` is the start of the newest row the recorder holds
+        for the statistic, or None if unknown. Digests of rows after it are
+        discarded first, since the recorder evidently does not have them.
+        """
+        known = self._digests.get(statistic_id, {})
+        if stored_until is None:
+            known = {}
+        elif known:
+            known = {
+                start: digest
+                for start, digest in known.items()
+                if int(start) <= stored_until
+            }
+
+        # Only rows near the end of the series are ever compared again, so
+        # older ones are neither hashed nor remembered
+        starts = [int(row["start"].timestamp()) for row in rows]
+        newest = max([*map(int, known), *starts[-1:]], default=0)
+        oldest = newest - STATISTICS_DIGEST_WINDOW.total_seconds()
+
+        changed = []
+        digests = {
+            start: digest for start, digest in known.items() if int(start) >= oldest
+        }
+        for start, row in zip(starts, rows):
+            if start < oldest:
+                changed.append(row)
+                continue
+            digest = _row_digest(start, row)
+            if digests.get(str(start)) != digest:
+                changed.append(row)
+                digests[str(start)] = digest
+
+        if digests != self._digests.get(statistic_id):
+            self._digests[statistic_id] = digests
+            self._store.async_set(STORE_SECTION, self._digests)
+        return changed
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the number of remembered rows per statistic for diagnostics."""
+        return {statistic_id: len(rows) for statistic_id, rows in self._digests.items()}
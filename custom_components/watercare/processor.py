@@ -0,0 +1,889 @@
+"""Per-endpoint processing of Watercare usage payloads."""
+
+from array import array
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+import logging
+import time
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util, slugify
+
+from .api import WatercareApi
+from .backfill import WatercareBackfill
+from .const import (
+    API_DATE_FORMAT,
+    BACKFILL_SEED_LOOKBACK,
+    BILLING_PERIOD_ENDPOINTS,
+    DOMAIN,
+    ENDPOINT_DISPLAY_NAMES,
+    EXECUTOR_THRESHOLD,
+    INCREMENTAL_OVERLAP,
+    NZ_TIMEZONE,
+    STATISTIC_TYPES,
+)
+from .aggregation import (
+    accumulate_statistics,
+    aggregate_daily,
+    aggregate_hourly,
+    billing_buckets,
+    carry_sums,
+    daily_buckets,
+    hourly_buckets,
+    merge_payload,
+    payload_high_water_mark,
+    period_days,
+    reading_columns,
+    trim_payload,
+    usage_entries,
+)
+from .metrics import WatercareMetrics
+from .parsing import (
+    date_to_nz_day,
+    nz_day_start,
+    nz_month_start,
+    nz_year_earlier,
+    parse_timestamp,
+)
+from .planner import StatisticsWritePlanner
+from .readings import ReadingStore
+from .storage import WatercareStore
+from .streaming import UsageStreamDecoder
+from .tariff import TariffSchedule
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class WatercareData:
+    """Processed usage for one endpoint, shared by its Watercare sensors."""
+
+    endpoint: str
+    usage: float | None = None
+    current_period_cost: float | None = None
+    current_period_cost_consumption: float | None = None
+    current_period_cost_wastewater: float | None = None
+    daily_average: float | None = None
+    household_efficiency_band: str | None = None
+    # Usage over each of USAGE_WINDOWS, and its cost under the key plus _cost
+    windows: dict[str, float | None] = field(default_factory=dict)
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class WatercareEndpointProcessor:
+    """Fetch, process and import statistics for one account's usage endpoint.
+
+    The login's primary account keeps the original statistic ids and store
+    keys; other accounts have their account number appended.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: WatercareApi,
+        store: WatercareStore,
+        endpoint: str,
+        tariffs: TariffSchedule,
+        account_number: str | None = None,
+        primary: bool = True,
+        metrics: WatercareMetrics | None = None,
+        planner: StatisticsWritePlanner | None = None,
+        readings: ReadingStore | None = None,
+    ):
+        """Initialise the processor."""
+        self.hass = hass
+        self._api = api
+        self._store = store
+        self._endpoint = endpoint
+        self._account_number = account_number
+        self._primary = primary
+        self._mark_key = endpoint if primary else f"{account_number}_{endpoint}"
+        self._metrics = metrics or WatercareMetrics()
+        self._planner = planner
+        # Raw readings kept on disk, for usage endpoints
+        self.readings = readings
+        # Start of the account's current billing period, when known
+        self.billing_period_start: float | None = None
+        self._payload = None
+        # Whether the last update found readings newer than any seen before
+        self.advanced = False
+        self._tariffs = tariffs
+        self.backfill = WatercareBackfill(
+            api,
+            store,
+            endpoint,
+            self._async_write_backfill_chunk,
+            None if primary else account_number,
+            async_prepare=self._async_prepare_backfill,
+            async_finish=self._async_finish_backfill,
+        )
+
+    def _cost_attributes(self, usage_litres, days, timestamp: float) -> dict:
+        """Return the cost attributes of usage, at the rates in effect then."""
+        tariff = self._tariffs.at(timestamp)
+        cost_breakdown = self._tariffs.cost(usage_litres, days, timestamp)
+        return {
+            "current_period_cost": round(cost_breakdown["total"], 2),
+            "current_period_cost_consumption": round(cost_breakdown["consumption"], 2),
+            "current_period_cost_wastewater": round(cost_breakdown["wastewater"], 2),
+            "consumption_rate_per_1000L": tariff.consumption_rate,
+            "wastewater_rate_per_1000L": tariff.wastewater_rate,
+        }
+
+    def _usage_windows(self) -> dict[str, float | None]:
+        """Return usage and cost over rolling windows up to the newest reading.
+
+        Each window is looked up in the reading store's running totals, so it
+        costs a few binary searches however much history is held. Windows
+        starting before the oldest stored reading are None, and a window
+        without readings costs nothing. The billing period falls back to the
+        calendar month when its start is unknown.
+        """
+        if self.readings is None or (span := self.readings.span) is None:
+            return {}
+        end = span[1] + 1
+        period_start = self.billing_period_start or nz_month_start(span[1])
+        windows = {
+            "last_24_hours": (end - 86400, end),
+            "last_7_days": (end - 7 * 86400, end),
+            "last_30_days": (end - 30 * 86400, end),
+            "billing_period_to_date": (period_start, end),
+            "same_period_last_year": (
+                nz_year_earlier(period_start),
+                nz_year_earlier(end),
+            ),
+        }
+
+        values = {}
+        for key, (start, window_end) in windows.items():
+            if start < span[0]:
+                # Only part of the window is stored
+                values[key] = values[f"{key}_cost"] = None
+            elif not self.readings.range(start, window_end)[0]:
+                values[key] = values[f"{key}_cost"] = 0.0
+            else:
+                values[key] = round(self.readings.total(start, window_end), 3)
+                cost = self._tariffs.cost_between(
+                    start, window_end, self.readings.total
+                )
+                values[f"{key}_cost"] = round(cost["total"], 2)
+        return values
+
+    def _get_statistic_name(self, statistic_type: str) -> str:
+        """Generate consistent statistic names based on endpoint and type."""
+        endpoint_name = ENDPOINT_DISPLAY_NAMES.get(
+            self._endpoint, self._endpoint.title()
+        )
+        type_name = STATISTIC_TYPES.get(statistic_type, statistic_type.title())
+        return f"Watercare {endpoint_name} {type_name}"
+
+    async def _async_write_backfill_chunk(self, payload, state):
+        """Feed one backfill chunk into the statistics writer."""
+        if self._endpoint not in BILLING_PERIOD_ENDPOINTS:
+            await self._async_record_readings(usage_entries(payload))
+
+        if self._endpoint == "dailywithstats":
+            usage_data = usage_entries(payload)
+            daily_consumption, newest = await self._async_compute(
+                len(usage_data), aggregate_daily, usage_data, state.get("last", "")
+            )
+            state = await self.generate_daily_statistics(daily_consumption, state)
+            return {**state, "last": newest}
+
+        if self._endpoint == "halfhourly":
+            usage_data = usage_entries(payload)
+            hourly_consumption, newest = await self._async_compute(
+                len(usage_data), aggregate_hourly, usage_data, state.get("last", "")
+            )
+            state = await self.generate_hourly_statistics(hourly_consumption, state)
+            return {**state, "last": newest}
+
+        if not isinstance(payload, list):
+            _LOGGER.warning(
+                f"Skipping unexpected backfill payload for {self._endpoint}"
+            )
+            return state
+        return await self.generate_statistics(payload, state)
+
+    async def _async_prepare_backfill(self, start: date, end: date) -> dict:
+        """Return the writer state a backfill from start to end begins with.
+
+        Sums continue from the newest recorded row before the start, so the
+        imported rows join the series before them. The sums recorded at the
+        end of the range are kept to re-base the rows after it afterwards.
+        """
+        kind = self._statistic_kind()
+        after = nz_day_start(date_to_nz_day(end) + 1)
+        return {
+            "sums": await self._async_sums_before(
+                kind, nz_day_start(date_to_nz_day(start))
+            ),
+            "rebase": {
+                "after": after.timestamp(),
+                "sums": await self._async_sums_before(kind, after),
+            },
+        }
+
+    async def _async_finish_backfill(self, state: dict):
+        """Shift the rows after a backfilled range to continue its new sums.
+
+        Without this, recalculated rows would leave a step in each series
+        where the backfill ended.
+        """
+        rebase = state.get("rebase")
+        if not rebase or not state.get("last"):
+            # Nothing was imported, so the recorded sums still line up
+            return
+
+        series = self._written_series(self._statistic_kind())
+        stored = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            dt_util.utc_from_timestamp(rebase["after"]),
+            None,
+            {f"{DOMAIN}:{statistic_key}" for statistic_key, _ in series.values()},
+            "hour",
+            None,
+            {"sum"},
+        )
+        for key, (statistic_key, name) in series.items():
+            shift = state.get("sums", {}).get(key, 0) - rebase["sums"].get(key, 0)
+            rows = stored.get(f"{DOMAIN}:{statistic_key}")
+            if not shift or not rows:
+                continue
+            _LOGGER.debug(f"Shifting {len(rows)} later {statistic_key} rows by {shift}")
+            self._import_statistics(
+                statistic_key,
+                name,
+                "L" if key == "consumption" else "NZD",
+                [
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(row["start"]),
+                        sum=row["sum"] + shift,
+                    )
+                    for row in rows
+                ],
+            )
+
+    async def _async_sums_before(self, kind: str, before: datetime) -> dict:
+        """Return the sum of the newest recorded row before a time, per series."""
+        series = self._statistic_series(kind)
+        stored = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            before - BACKFILL_SEED_LOOKBACK,
+            before,
+            {f"{DOMAIN}:{statistic_key}" for statistic_key, _ in series.values()},
+            "hour",
+            None,
+            {"sum"},
+        )
+        sums = {}
+        for key, (statistic_key, _) in series.items():
+            if rows := stored.get(f"{DOMAIN}:{statistic_key}"):
+                sums[key] = rows[-1]["sum"]
+        return sums
+
+    async def _async_compute(self, size: int, target, *args):
+        """Run pure processing work, in the executor if its input is large.
+
+        Below EXECUTOR_THRESHOLD items the hand-off costs more than the work.
+        """
+        if size < EXECUTOR_THRESHOLD:
+            return target(*args)
+        return await self.hass.async_add_executor_job(target, *args)
+
+    async def _async_record_readings(self, usage_data, columns=None):
+        """Add raw readings to the reading store.
+
+        ``columns`` are the readings already split into epoch seconds and
+        litres; otherwise they are taken from ``usage_data``. Failing to
+        write them is logged rather than failing the update.
+        """
+        if self.readings is None or not (usage_data or columns):
+            return
+        with self._metrics.timer("readings"):
+            try:
+                added = await self.hass.async_add_executor_job(
+                    self._record_readings, usage_data, columns
+                )
+            except OSError as err:
+                _LOGGER.warning(f"Failed to store {self._endpoint} readings: {err}")
+                return
+        self._metrics.increment("readings_stored", added)
+
+    def _record_readings(self, usage_data, columns) -> int:
+        """Load the reading store if needed and add readings to it."""
+        if not self.readings.loaded:
+            self.readings.load()
+        times, litres = columns or reading_columns(usage_data)
+        return self.readings.add(times, litres)
+
+    def _fetch_window(self, state) -> tuple[str | None, str | None]:
+        """Return the from/to dates for the next incremental fetch."""
+        # Without stored statistics to continue from, fetch the full default range
+        if "consumption" not in state.get("resume", {}):
+            return None, None
+
+        high_water_mark = self._store.get("high_water_marks", {}).get(self._mark_key)
+        if not high_water_mark:
+            return None, None
+
+        try:
+            newest = parse_timestamp(high_water_mark)
+        except ValueError:
+            _LOGGER.warning(f"Ignoring invalid high-water mark {high_water_mark}")
+            return None, None
+
+        start = datetime.fromtimestamp(newest, NZ_TIMEZONE) - INCREMENTAL_OVERLAP
+        end = datetime.now(NZ_TIMEZONE) + timedelta(days=1)
+        return start.strftime(API_DATE_FORMAT), end.strftime(API_DATE_FORMAT)
+
+    @staticmethod
+    def _window_start(start_date: str) -> str:
+        """Return the UTC timestamp of NZ midnight on a window's start date."""
+        start = NZ_TIMEZONE.localize(datetime.strptime(start_date, API_DATE_FORMAT))
+        return start.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+    def _update_high_water_mark(self, newest: str | None) -> bool:
+        """Record the newest timestamp ingested, returning True if it advanced."""
+        marks = dict(self._store.get("high_water_marks", {}))
+        if newest and newest > marks.get(self._mark_key, ""):
+            marks[self._mark_key] = newest
+            self._store.async_set("high_water_marks", marks)
+            return True
+        return False
+
+    async def async_update(self) -> WatercareData:
+        """Fetch the latest window of usage, process it and import statistics.
+
+        Raises UpdateFailed if nothing usable was returned.
+        """
+        _LOGGER.debug(
+            f"Beginning update of account {self._account_number} "
+            f"using endpoint: {self._endpoint}"
+        )
+        state = await self._async_resume_state(self._statistic_kind())
+        start_date, end_date = self._fetch_window(state)
+        if start_date is None and self._endpoint in ("halfhourly", "dailywithstats"):
+            return await self._async_stream_update(state)
+
+        payload = await self._api.get_usage(
+            endpoint=self._endpoint,
+            start_date=start_date,
+            end_date=end_date,
+            account_number=self._account_number,
+        )
+
+        if payload is None:
+            raise UpdateFailed("No usable response received from Watercare API")
+
+        if self._endpoint not in BILLING_PERIOD_ENDPOINTS and isinstance(payload, list):
+            # Usage endpoints may return a bare list of readings
+            payload = {"usage": payload}
+        if self._endpoint not in BILLING_PERIOD_ENDPOINTS:
+            await self._async_record_readings(usage_entries(payload))
+
+        self._payload = await self._async_compute(
+            len(usage_entries(self._payload)), merge_payload, self._payload, payload
+        )
+        if start_date is not None:
+            # Rows before the window are already recorded and never rewritten
+            self._payload = trim_payload(self._payload, self._window_start(start_date))
+        if self._endpoint in BILLING_PERIOD_ENDPOINTS:
+            state = await self._async_billing_state(self._payload, state)
+
+        # Route to appropriate processing method based on endpoint
+        if self._endpoint == "dailywithstats":
+            data = await self.process_daily_data(self._payload, state)
+        elif self._endpoint == "halfhourly":
+            data = await self.process_halfhourly_data(self._payload, state)
+        else:
+            # For mechanicalmonthly and monthly - use the billing period processing
+            data = await self.process_data(self._payload, state)
+
+        if data is None:
+            raise UpdateFailed(f"No usage found for endpoint {self._endpoint}")
+        # Only once its statistics are written, so a failed update fetches
+        # the same window again
+        self.advanced = self._update_high_water_mark(payload_high_water_mark(payload))
+        return data
+
+    async def _async_stream_update(self, state) -> WatercareData:
+        """Fetch the full range of readings, aggregating them as they stream in.
+
+        The full range can be years of readings, so they are summed into
+        buckets batch by batch rather than decoded into one payload first.
+        Raises UpdateFailed if nothing usable was returned.
+        """
+        daily = self._endpoint == "dailywithstats"
+        aggregate = aggregate_daily if daily else aggregate_hourly
+        totals = {}
+        newest = ""
+        elapsed = 0.0
+        times = array("q")
+        litres = array("d")
+
+        def on_entries(entries):
+            nonlocal newest, elapsed
+            start = time.monotonic()
+            batch, batch_newest = aggregate(entries)
+            for key, value in batch.items():
+                totals[key] = totals.get(key, 0) + value
+            newest = max(newest, batch_newest)
+            if self.readings is not None:
+                # Kept as columns, far smaller than the decoded entries
+                batch_times, batch_litres = reading_columns(entries)
+                times.extend(batch_times)
+                litres.extend(batch_litres)
+            elapsed += time.monotonic() - start
+
+        def on_reset():
+            nonlocal newest
+            totals.clear()
+            newest = ""
+            del times[:]
+            del litres[:]
+
+        rest = await self._api.get_usage_stream(
+            UsageStreamDecoder(on_entries, on_reset),
+            self._endpoint,
+            account_number=self._account_number,
+        )
+        if rest is None:
+            raise UpdateFailed("No usable response received from Watercare API")
+        self._metrics.record("aggregate", elapsed)
+        if times:
+            await self._async_record_readings(None, (times, litres))
+
+        # Later windowed fetches are processed on their own
+        self._payload = None
+
+        consumption = dict(sorted(totals.items()))
+        if daily:
+            data = await self._daily_result(
+                consumption, rest.get("statistics", {}), state
+            )
+        elif consumption:
+            data = await self._hourly_result(consumption, newest, state)
+        else:
+            _LOGGER.warning("No half-hourly readings found")
+            data = None
+
+        if data is None:
+            raise UpdateFailed(f"No usage found for endpoint {self._endpoint}")
+        self.advanced = self._update_high_water_mark(newest or None)
+        return data
+
+    async def process_data(self, billing_periods, state=None) -> WatercareData | None:
+        """Process the billing periods returned by the API."""
+        _LOGGER.debug(f"Processing {len(billing_periods or [])} billing periods")
+
+        if not billing_periods:
+            _LOGGER.warning("No billing periods found")
+            return None
+
+        # Get the most recent billing period for current usage
+        latest_period = billing_periods[0]
+        daily_average = latest_period.get("statistics", {}).get("dailyAverage", 0)
+
+        # Set the sensor state to cumulative usage for Energy Dashboard
+        billing_period_usage = latest_period.get("waterUsage", 0)
+
+        period_start = parse_timestamp(latest_period.get("billingPeriodFromDate"))
+        numberOfDays = period_days(
+            period_start, parse_timestamp(latest_period.get("billingPeriodToDate"))
+        )
+
+        household_efficiency_band = (
+            latest_period.get("statistics", {})
+            .get("efficiency", {})
+            .get("currentHouseholdBand")
+        )
+        attributes = {
+            "billing_period_usage": billing_period_usage,
+            "daily_average": daily_average,
+            "billing_period_from": latest_period.get("billingPeriodFromDate"),
+            "billing_period_to": latest_period.get("billingPeriodToDate"),
+            "reading_type": latest_period.get("readingType"),
+            "household_efficiency_band": household_efficiency_band,
+            **self._cost_attributes(billing_period_usage, numberOfDays, period_start),
+            "endpoint": self._endpoint,
+            "cost_currency": "NZD",
+        }
+
+        # Generate external statistics for Energy Dashboard
+        await self.generate_statistics(billing_periods, state)
+
+        return WatercareData(
+            endpoint=self._endpoint,
+            usage=billing_period_usage,
+            current_period_cost=attributes["current_period_cost"],
+            current_period_cost_consumption=attributes[
+                "current_period_cost_consumption"
+            ],
+            current_period_cost_wastewater=attributes["current_period_cost_wastewater"],
+            daily_average=daily_average,
+            household_efficiency_band=household_efficiency_band,
+            attributes=attributes,
+        )
+
+    async def generate_statistics(self, billing_periods, state=None):
+        """Generate external statistics from billing period data following Energy Dashboard pattern.
+
+        When a state from a previous call is given, running sums continue from
+        it and periods it already covered are skipped. Returns the new state.
+        """
+        state = state or {}
+        if not billing_periods:
+            return state
+
+        buckets, last = await self._async_compute(
+            len(billing_periods),
+            billing_buckets,
+            billing_periods,
+            state.get("last", ""),
+        )
+        state = await self._async_write_statistics("billing", buckets, state)
+        return {**state, "last": last}
+
+    async def process_daily_data(self, parsed_data, state=None) -> WatercareData | None:
+        """Process the daily data."""
+        if not isinstance(parsed_data, dict):
+            _LOGGER.error("Unexpected response format for dailywithstats endpoint")
+            return None
+
+        usage_data = parsed_data.get("usage", [])
+        statistic_data = parsed_data.get("statistics", {})
+
+        with self._metrics.timer("aggregate"):
+            daily_consumption, _ = await self._async_compute(
+                len(usage_data), aggregate_daily, usage_data
+            )
+
+        return await self._daily_result(daily_consumption, statistic_data, state)
+
+    async def _daily_result(
+        self, daily_consumption, statistic_data, state=None
+    ) -> WatercareData:
+        """Import daily totals and build the sensor data for them."""
+        _LOGGER.debug(f"Daily consumption for {len(daily_consumption)} days")
+
+        # Assign yesterday's consumption to state
+        yesterday = date_to_nz_day(datetime.now(NZ_TIMEZONE).date()) - 1
+        yesterday_consumption = daily_consumption.get(yesterday, 0)
+        _LOGGER.debug(f"yesterday_consumption: {yesterday_consumption}")
+
+        efficiency_data = statistic_data.get("efficiency", {})
+        attributes = {
+            "yesterday_consumption": yesterday_consumption,
+            # Cost of yesterday's consumption
+            **self._cost_attributes(
+                yesterday_consumption, 1, nz_day_start(yesterday).timestamp()
+            ),
+            "endpoint": self._endpoint,
+            "cost_currency": "NZD",
+            "currentPeriodAverage": statistic_data.get("currentPeriodAverage"),
+            "differenceToPreviousPeriod": statistic_data.get(
+                "differenceToPreviousPeriod"
+            ),
+            "currentHouseholdBand": efficiency_data.get("currentHouseholdBand"),
+            "usageToLowerBand": efficiency_data.get("usageToLowerBand"),
+        }
+
+        # Generate statistics for daily data
+        await self.generate_daily_statistics(daily_consumption, state)
+
+        return WatercareData(
+            endpoint=self._endpoint,
+            usage=yesterday_consumption,
+            current_period_cost=attributes["current_period_cost"],
+            current_period_cost_consumption=attributes[
+                "current_period_cost_consumption"
+            ],
+            current_period_cost_wastewater=attributes["current_period_cost_wastewater"],
+            daily_average=statistic_data.get("currentPeriodAverage"),
+            household_efficiency_band=efficiency_data.get("currentHouseholdBand"),
+            windows=self._usage_windows(),
+            attributes=attributes,
+        )
+
+    async def generate_daily_statistics(self, daily_consumption, state=None):
+        """Generate external statistics from daily consumption totals.
+
+        When a state from a previous call is given, running sums continue from
+        it. Returns the new state.
+        """
+        buckets = await self._async_compute(
+            len(daily_consumption), daily_buckets, daily_consumption
+        )
+        return await self._async_write_statistics("daily", buckets, state)
+
+    async def process_halfhourly_data(
+        self, parsed_data, state=None
+    ) -> WatercareData | None:
+        """Process half-hourly smart meter readings."""
+        usage_data = usage_entries(parsed_data)
+        if not usage_data:
+            _LOGGER.warning("No half-hourly readings found")
+            return None
+
+        with self._metrics.timer("aggregate"):
+            hourly_consumption, newest = await self._async_compute(
+                len(usage_data), aggregate_hourly, usage_data
+            )
+
+        return await self._hourly_result(hourly_consumption, newest, state)
+
+    async def _hourly_result(
+        self, hourly_consumption, newest, state=None
+    ) -> WatercareData:
+        """Import hourly totals and build the sensor data for them."""
+        # Sum yesterday's NZ calendar day from the hourly buckets
+        yesterday = date_to_nz_day(datetime.now(NZ_TIMEZONE).date()) - 1
+        first_hour = int(nz_day_start(yesterday).timestamp()) // 3600
+        last_hour = int(nz_day_start(yesterday + 1).timestamp()) // 3600
+        yesterday_consumption = sum(
+            hourly_consumption.get(hour, 0) for hour in range(first_hour, last_hour)
+        )
+        _LOGGER.debug(f"yesterday_consumption: {yesterday_consumption}")
+
+        attributes = {
+            "yesterday_consumption": yesterday_consumption,
+            "latest_reading": newest,
+            **self._cost_attributes(
+                yesterday_consumption, 1, nz_day_start(yesterday).timestamp()
+            ),
+            "endpoint": self._endpoint,
+            "cost_currency": "NZD",
+        }
+
+        await self.generate_hourly_statistics(hourly_consumption, state)
+
+        return WatercareData(
+            endpoint=self._endpoint,
+            usage=yesterday_consumption,
+            current_period_cost=attributes["current_period_cost"],
+            current_period_cost_consumption=attributes[
+                "current_period_cost_consumption"
+            ],
+            current_period_cost_wastewater=attributes["current_period_cost_wastewater"],
+            windows=self._usage_windows(),
+            attributes=attributes,
+        )
+
+    async def generate_hourly_statistics(self, hourly_consumption, state=None):
+        """Generate hourly external statistics from hourly consumption totals.
+
+        When a state from a previous call is given, running sums continue from
+        it. Returns the new state.
+        """
+        buckets = await self._async_compute(
+            len(hourly_consumption), hourly_buckets, hourly_consumption
+        )
+        return await self._async_write_statistics("hourly", buckets, state)
+
+    def _statistic_kind(self) -> str:
+        """Return the kind of statistics buckets produced by the endpoint."""
+        if self._endpoint == "dailywithstats":
+            return "daily"
+        if self._endpoint == "halfhourly":
+            return "hourly"
+        return "billing"
+
+    def _statistic_series(self, kind: str) -> dict[str, tuple[str, str]]:
+        """Return the statistic id suffix and name of each series for a kind."""
+        if kind == "billing":
+            series = {
+                "consumption": ("water_consumption", "Watercare Water Consumption"),
+                "cost": ("water_cost", "Watercare Total Cost"),
+                "consumption_cost": ("consumption_cost", "Watercare Consumption Cost"),
+                "wastewater_cost": ("wastewater_cost", "Watercare Wastewater Cost"),
+            }
+        else:
+            series = {
+                key: (f"{kind}_{key}", self._get_statistic_name(key))
+                for key in STATISTIC_TYPES
+            }
+        if self._primary:
+            return series
+        return {
+            key: (
+                f"{statistic_key}_{slugify(self._account_number)}",
+                f"{name} {self._account_number}",
+            )
+            for key, (statistic_key, name) in series.items()
+        }
+
+    def _written_series(self, kind: str) -> dict[str, tuple[str, str]]:
+        """Return the series written for a kind, leaving out uncharged costs."""
+        series = self._statistic_series(kind)
+        if not self._tariffs.charges_consumption():
+            series.pop("consumption_cost")
+        if not self._tariffs.charges_wastewater():
+            series.pop("wastewater_cost")
+        return series
+
+    async def _async_resume_state(self, kind: str) -> dict:
+        """Return the writer state that continues the series in the recorder.
+
+        The newest stored row is rewritten, since it may have been imported
+        while its bucket was still filling, so sums resume from the row
+        before it.
+        """
+        series = self._statistic_series(kind)
+        results = await asyncio.gather(
+            *(
+                get_instance(self.hass).async_add_executor_job(
+                    get_last_statistics,
+                    self.hass,
+                    2,
+                    f"{DOMAIN}:{statistic_key}",
+                    True,
+                    {"sum"},
+                )
+                for statistic_key, _ in series.values()
+            )
+        )
+
+        sums = {}
+        resume = {}
+        for (key, (statistic_key, _)), result in zip(series.items(), results):
+            rows = result.get(f"{DOMAIN}:{statistic_key}", [])
+            if rows:
+                resume[key] = rows[0]["start"]
+                sums[key] = rows[1]["sum"] if len(rows) > 1 else 0
+
+        _LOGGER.debug(f"Resuming {kind} statistics from {resume}")
+        return {"sums": sums, "resume": resume}
+
+    async def _async_billing_state(self, billing_periods, state: dict) -> dict:
+        """Return the writer state that rewrites the billing periods still changing.
+
+        An open period's row starts at its ToDate, which moves on with every
+        reading, so the newest recorded row may be at an earlier ToDate of a
+        period that has grown since. Sums resume from the last row before the
+        oldest period ending at or after that row, and recorded rows from then
+        on that no longer end a period are rewritten to carry the sum on.
+        """
+        resume = state.get("resume", {})
+        if not resume or not isinstance(billing_periods, list):
+            return state
+
+        newest = max(resume.values())
+        starts = []
+        for period in billing_periods:
+            try:
+                if parse_timestamp(period.get("billingPeriodToDate")) >= newest:
+                    starts.append(parse_timestamp(period.get("billingPeriodFromDate")))
+            except (TypeError, ValueError):
+                continue
+        if not starts:
+            return state
+
+        since = min(starts)
+        series = self._written_series("billing")
+        stored = await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            dt_util.utc_from_timestamp(since) - BACKFILL_SEED_LOOKBACK,
+            None,
+            {f"{DOMAIN}:{statistic_key}" for statistic_key, _ in series.values()},
+            "hour",
+            None,
+            {"sum"},
+        )
+        sums = {}
+        superseded = {}
+        for key, (statistic_key, _) in series.items():
+            rows = stored.get(f"{DOMAIN}:{statistic_key}", [])
+            before = [row for row in rows if row["start"] < since]
+            sums[key] = before[-1]["sum"] if before else 0
+            superseded[key] = [row["start"] for row in rows[len(before) :]]
+
+        _LOGGER.debug(f"Rewriting billing statistics from {since}")
+        return {
+            **state,
+            "sums": sums,
+            "resume": dict.fromkeys(series, since),
+            "superseded": superseded,
+        }
+
+    async def _async_write_statistics(self, kind: str, buckets, state=None) -> dict:
+        """Accumulate buckets into running sums and import them in one pass.
+
+        ``buckets`` are ``(start, litres, days)`` tuples, oldest first. Sums
+        continue from ``state["sums"]`` and, for series with a resume point in
+        ``state["resume"]``, buckets starting before it are skipped so only
+        new rows are submitted. Recorded rows listed in ``state["superseded"]``
+        are rewritten to carry the sum on. Costs use the tariff in effect at
+        each bucket. Only the recorder submission runs on the event loop for large batches.
+        Returns the new state.
+        """
+        state = state or {}
+        series = self._written_series(kind)
+        resume = state.get("resume", {})
+        superseded = state.get("superseded", {})
+
+        with self._metrics.timer("statistics"):
+            rows, sums = await self._async_compute(
+                len(buckets),
+                accumulate_statistics,
+                buckets,
+                self._tariffs,
+                list(series),
+                state.get("sums", {}),
+                resume,
+            )
+
+        with self._metrics.timer("statistics_import"):
+            for key, (statistic_key, name) in series.items():
+                series_rows = rows[key]
+                if superseded.get(key):
+                    series_rows = carry_sums(
+                        series_rows, state.get("sums", {}).get(key, 0), superseded[key]
+                    )
+                if self._planner is not None:
+                    # Leave out rows already imported with the same values
+                    planned = self._planner.plan(
+                        f"{DOMAIN}:{statistic_key}", series_rows, resume.get(key)
+                    )
+                    self._metrics.increment(
+                        "rows_skipped", len(series_rows) - len(planned)
+                    )
+                    series_rows = planned
+                if series_rows:
+                    unit = "L" if key == "consumption" else "NZD"
+                    self._import_statistics(statistic_key, name, unit, series_rows)
+                elif key == "consumption":
+                    _LOGGER.debug(f"No new {kind} statistics to add")
+
+        return {
+            **{key: value for key, value in state.items() if key != "superseded"},
+            "sums": sums,
+        }
+
+    def _import_statistics(self, key, name, unit, statistics):
+        """Submit a series of external statistics to the recorder."""
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=name,
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{key}",
+            unit_of_measurement=unit,
+        )
+
+        _LOGGER.debug(f"Adding {len(statistics)} {key} statistics")
+        self._metrics.increment("rows_written", len(statistics))
+        async_add_external_statistics(self.hass, metadata, statistics)
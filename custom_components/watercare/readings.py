@@ -0,0 +1,225 @@
+"""Compact on-disk store of raw meter readings."""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+import logging
+import os
+import struct
+import sys
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import slugify
+
+from .const import DOMAIN, READINGS_COMPACT_RECORDS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Compacted file: header, then every timestamp, then every litres value
+MAGIC = b"WCR1"
+HEADER = struct.Struct("<4sI")
+# Tail file: (timestamp, litres) records appended since the last compaction
+RECORD = struct.Struct("<qd")
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def readings_dir(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the directory holding a config entry's reading files."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry_id}.readings")
+
+
+def readings_path(
+    hass: HomeAssistant, entry_id: str, account: str, endpoint: str
+) -> str:
+    """Return the path of the reading file for one account's endpoint."""
+    return os.path.join(readings_dir(hass, entry_id), f"{slugify(account)}_{endpoint}")
+
+
+def _to_bytes(values: array) -> bytes:
+    """Return an array's contents as little-endian bytes."""
+    if _LITTLE_ENDIAN:
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    """Return an array read from little-endian bytes."""
+    values = array(typecode)
+    values.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+class ReadingStore:
+    """Raw readings of one account's endpoint, ordered by timestamp.
+
+    Readings are held as two parallel arrays, epoch seconds and litres, so
+    five years of half-hourly readings take under 2 MB. On disk a compacted
+    file holds the two columns one after the other, and new or changed
+    readings are appended to a tail file of fixed-width records; loading
+    merges the tail in, and it is folded into the compacted file once it
+    reaches READINGS_COMPACT_RECORDS. Range reads binary search the
+    timestamps, and a running total of litres kept alongside answers the
+    usage between two times with two searches and a subtraction. Loading,
+    adding and compacting do blocking file IO, so run them in the executor.
+    """
+
+    def __init__(self, path: str):
+        """Initialise an empty store backed by files at ``path``."""
+        self._path = path
+        self._tail_path = f"{path}.tail"
+        self._times = array("q")
+        self._litres = array("d")
+        # _sums[i] is the total of the first i readings
+        self._sums = array("d", [0.0])
+        self._tail_records = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        """Return the number of readings held."""
+        return len(self._times)
+
+    @property
+    def span(self) -> tuple[int, int] | None:
+        """Return the first and last timestamps held, if any."""
+        if not self._times:
+            return None
+        return self._times[0], self._times[-1]
+
+    def load(self):
+        """Read the compacted file and replay the tail."""
+        self._times = array("q")
+        self._litres = array("d")
+        self._tail_records = 0
+        try:
+            with open(self._path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = b""
+
+        if data:
+            magic, count = HEADER.unpack_from(data.ljust(HEADER.size, b"\0"))
+            column = count * 8
+            if magic != MAGIC or len(data) != HEADER.size + 2 * column:
+                _LOGGER.warning(f"Discarding unreadable readings file {self._path}")
+            else:
+                offset = HEADER.size
+                self._times = _from_bytes("q", data[offset : offset + column])
+                self._litres = _from_bytes("d", data[offset + column :])
+        self._update_sums(0)
+
+        try:
+            with open(self._tail_path, "rb") as file:
+                tail = file.read()
+        except FileNotFoundError:
+            tail = b""
+        # A record cut short by a crash mid-append is dropped
+        usable = len(tail) - len(tail) % RECORD.size
+        records = list(RECORD.iter_unpack(tail[:usable]))
+        if records:
+            self._merge(dict(records))
+            self._tail_records = len(records)
+        self.loaded = True
+
+    def add(self, times: Iterable[int], litres: Iterable[float]) -> int:
+        """Store readings, replacing any with the same timestamp.
+
+        Only new or changed readings are written. They are held in memory only
+        once written, so after a failed write the next call writes them again.
+        Returns how many there were.
+        """
+        readings = dict(zip(times, litres))
+        if self._times:
+            readings = {
+                timestamp: value
+                for timestamp, value in readings.items()
+                if self.get(timestamp) != value
+            }
+        if not readings:
+            return 0
+
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        with open(self._tail_path, "ab") as file:
+            file.write(
+                b"".join(
+                    RECORD.pack(timestamp, value)
+                    for timestamp, value in sorted(readings.items())
+                )
+            )
+        self._merge(readings)
+        self._tail_records += len(readings)
+        if self._tail_records >= READINGS_COMPACT_RECORDS:
+            self.compact()
+        return len(readings)
+
+    def _merge(self, readings: dict[int, float]):
+        """Merge readings into the arrays, keeping them ordered."""
+        ordered = sorted(readings.items())
+        if not self._times or ordered[0][0] > self._times[-1]:
+            # New readings normally all follow the ones already held
+            index = len(self._times)
+            self._times.extend(timestamp for timestamp, _ in ordered)
+            self._litres.extend(value for _, value in ordered)
+            self._update_sums(index)
+            return
+
+        # Rebuild only from the first affected reading onwards
+        index = bisect_left(self._times, ordered[0][0])
+        merged = dict(zip(self._times[index:], self._litres[index:]))
+        merged.update(ordered)
+        del self._times[index:]
+        del self._litres[index:]
+        for timestamp in sorted(merged):
+            self._times.append(timestamp)
+            self._litres.append(merged[timestamp])
+        self._update_sums(index)
+
+    def _update_sums(self, index: int):
+        """Recompute the running totals from the reading at ``index`` on."""
+        del self._sums[index + 1 :]
+        total = self._sums[index]
+        sums = self._sums
+        for value in self._litres[index:]:
+            total += value
+            sums.append(total)
+
+    def compact(self):
+        """Rewrite the compacted file with every reading and clear the tail."""
+        temporary = f"{self._path}.tmp"
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(self._times)))
+            file.write(_to_bytes(self._times))
+            file.write(_to_bytes(self._litres))
+        os.replace(temporary, self._path)
+        # Everything in the tail is now in the compacted file
+        if os.path.exists(self._tail_path):
+            os.remove(self._tail_path)
+        self._tail_records = 0
+
+    def get(self, timestamp: int) -> float | None:
+        """Return the litres of the reading at a timestamp, if held."""
+        index = bisect_left(self._times, timestamp)
+        if index < len(self._times) and self._times[index] == timestamp:
+            return self._litres[index]
+        return None
+
+    def _bounds(self, start: float, end: float) -> tuple[int, int]:
+        """Return the index range of readings from start until end."""
+        first = bisect_left(self._times, start)
+        return first, bisect_left(self._times, end, first)
+
+    def range(self, start: float, end: float) -> tuple[array, array]:
+        """Return the timestamps and litres of readings from start until end."""
+        first, last = self._bounds(start, end)
+        return self._times[first:last], self._litres[first:last]
+
+    def total(self, start: float, end: float) -> float:
+        """Return the litres of readings from start until end."""
+        first, last = self._bounds(start, end)
+        return self._sums[last] - self._sums[first]
@@ -0,0 +1,119 @@
+"""Retry and circuit breaker helpers for Watercare API requests."""
+
+from email.utils import parsedate_to_datetime
+from collections.abc import Mapping
+import logging
+import random
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int, base: float, cap: float | None = None) -> float:
+    """Return an exponential backoff delay with jitter for a zero-based attempt."""
+    delay = base * 2**attempt * (1 + random.random())
+    return min(delay, cap) if cap is not None else delay
+
+
+def parse_retry_after(headers: Mapping[str, str], cap: float) -> float | None:
+    """Return the Retry-After delay in seconds, capped, or None if absent."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0.0), cap)
+
+
+class CircuitBreaker:
+    """Stop calling an API that keeps failing, and probe it again later.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    requests are refused for ``reset_timeout`` seconds. It then lets a single
+    trial request through; success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """Initialise the breaker closed."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_started: float | None = None
+        self._last_failure: str | None = None
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Return the current state of the breaker."""
+        if self._opened_at is None:
+            return CLOSED
+        if time.time() < self._opened_at + self._reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be made now."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        # A trial that never reported back (e.g. cancelled) is given up on
+        now = time.time()
+        if state == HALF_OPEN and (
+            self._trial_started is None
+            or now > self._trial_started + self._reset_timeout
+        ):
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self):
+        """Close the breaker after a successful request."""
+        if self._opened_at is not None:
+            _LOGGER.info("Watercare API recovered, closing circuit breaker")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started = None
+
+    def record_failure(self, reason: str):
+        """Count a failed request, opening the breaker at the threshold."""
+        self._failures += 1
+        self._last_failure = reason
+        reopen = self._trial_started is not None
+        self._trial_started = None
+        if reopen or (
+            self._opened_at is None and self._failures >= self._failure_threshold
+        ):
+            self._opened_at = time.time()
+            self._times_opened += 1
+            _LOGGER.warning(
+                f"Watercare API failing ({reason}), pausing requests for "
+                f"{self._reset_timeout}s"
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self._failure_threshold,
+            "reset_timeout": self._reset_timeout,
+            "opened_at": self._opened_at,
+            "retry_at": (
+                self._opened_at + self._reset_timeout
+                if self._opened_at is not None
+                else None
+            ),
+            "times_opened": self._times_opened,
+            "last_failure": self._last_failure,
+        }
@@ -0,0 +1,126 @@
+"""Adaptive polling for the Watercare integration."""
+
+from datetime import datetime, time, timedelta
+import logging
+from statistics import median
+
+from .const import (
+    BILLING_PERIOD_ENDPOINTS,
+    NZ_TIMEZONE,
+    POLL_ARRIVAL_HISTORY,
+    POLL_ARRIVAL_MIN_OBSERVATIONS,
+    POLL_ARRIVAL_WINDOW,
+    POLL_DUE_MARGIN,
+    POLL_INTERVALS,
+)
+from .storage import WatercareStore
+
+_LOGGER = logging.getLogger(__name__)
+
+STORE_SECTION = "schedule"
+
+
+def _poll_limits(endpoint: str) -> tuple[timedelta, timedelta, timedelta]:
+    """Return the shortest, longest backoff and longest wait for an endpoint."""
+    kind = "billing" if endpoint in BILLING_PERIOD_ENDPOINTS else "smart"
+    return POLL_INTERVALS[kind]
+
+
+class WatercareScheduler:
+    """Choose the next poll from when each endpoint has published before.
+
+    Every poll that finds newer readings records an estimated arrival time of
+    day. Once a few arrivals are known, polls wait for the window around their
+    median, run at the shortest interval inside it, and back off exponentially
+    if the data is late. Endpoints without a learned window simply back off
+    while their data is unchanged. Each endpoint keeps its own next poll, and
+    updates only poll the endpoints that are due.
+    """
+
+    def __init__(self, store: WatercareStore):
+        """Initialise the scheduler from the persisted arrival history."""
+        self._store = store
+        self._unchanged: dict[str, int] = {}
+        self._last_poll: dict[str, datetime] = {}
+        self._next_poll: dict[str, datetime] = {}
+
+    def _history(self, endpoint: str) -> dict:
+        """Return the persisted arrivals and last change for an endpoint."""
+        return self._store.get(STORE_SECTION, {}).get(endpoint, {})
+
+    def record(self, endpoint: str, changed: bool, now: datetime):
+        """Record the outcome of a poll of an endpoint."""
+        previous = self._last_poll.get(endpoint)
+        self._last_poll[endpoint] = now
+        if not changed:
+            self._unchanged[endpoint] = self._unchanged.get(endpoint, 0) + 1
+            self._next_poll[endpoint] = now + self._interval(endpoint, now)
+            return
+
+        self._unchanged[endpoint] = 0
+        history = dict(self._history(endpoint))
+        arrivals = list(history.get("arrivals", []))
+        if previous is not None:
+            # The readings landed some time since the previous poll
+            arrived = (previous + (now - previous) / 2).astimezone(NZ_TIMEZONE)
+            arrivals.append(arrived.hour * 60 + arrived.minute)
+            arrivals = arrivals[-POLL_ARRIVAL_HISTORY:]
+        history["arrivals"] = arrivals
+        history["last_change"] = now.timestamp()
+
+        schedule = dict(self._store.get(STORE_SECTION, {}))
+        schedule[endpoint] = history
+        self._store.async_set(STORE_SECTION, schedule)
+        self._next_poll[endpoint] = now + self._interval(endpoint, now)
+
+    def due(self, endpoint: str, now: datetime) -> bool:
+        """Return True if an endpoint should be polled now."""
+        next_poll = self._next_poll.get(endpoint)
+        return next_poll is None or next_poll - POLL_DUE_MARGIN <= now
+
+    def next_interval(self, endpoints: list[str], now: datetime) -> timedelta:
+        """Return the delay until the next endpoint is due.
+
+        An endpoint that is overdue, because its last poll failed, is retried
+        after its shortest interval.
+        """
+        intervals = []
+        for endpoint in endpoints:
+            next_poll = self._next_poll.get(endpoint)
+            if next_poll is None or next_poll <= now:
+                intervals.append(_poll_limits(endpoint)[0])
+            else:
+                intervals.append(next_poll - now)
+        interval = min(intervals)
+        _LOGGER.debug(f"Next Watercare poll in {interval}")
+        return interval
+
+    def _interval(self, endpoint: str, now: datetime) -> timedelta:
+        """Return the delay until an endpoint should next be polled."""
+        shortest, longest_backoff, longest_wait = _poll_limits(endpoint)
+        backoff = min(shortest * 2 ** self._unchanged.get(endpoint, 0), longest_backoff)
+
+        history = self._history(endpoint)
+        arrivals = history.get("arrivals", [])
+        if len(arrivals) < POLL_ARRIVAL_MIN_OBSERVATIONS:
+            return backoff
+
+        centre = median(arrivals)
+        spread = median(abs(minute - centre) for minute in arrivals)
+        half_width = max(POLL_ARRIVAL_WINDOW, timedelta(minutes=2 * spread))
+
+        local_now = now.astimezone(NZ_TIMEZONE)
+        midnight = NZ_TIMEZONE.localize(datetime.combine(local_now.date(), time()))
+        window_start = midnight + timedelta(minutes=centre) - half_width
+        window_end = midnight + timedelta(minutes=centre) + half_width
+
+        received = history.get("last_change", 0) >= window_start.timestamp()
+        if received or local_now < window_start:
+            # Sleep until the next window opens
+            if local_now >= window_start:
+                window_start += timedelta(days=1)
+            return min(max(window_start - local_now, shortest), longest_wait)
+        if local_now <= window_end:
+            return shortest
+        # Later than usual; keep checking, but less and less often
+        return backoff
@@ -1,38 +1,173 @@
 """Watercare sensors."""
 
-from datetime import datetime, timedelta
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
-import json
-import pytz
 
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
-from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
-    NZ_TIMEZONE,
-    SENSOR_NAME,
-    CONF_CONSUMPTION_RATE,
-    CONF_WASTEWATER_RATE,
-    CONF_WASTEWATER_RATIO,
-    CONF_ANNUAL_LINE_CHARGE,
-    CONF_ENDPOINT,
-    DEFAULT_CONSUMPTION_RATE,
-    DEFAULT_WASTEWATER_RATE,
-    DEFAULT_WASTEWATER_RATIO,
-    DEFAULT_ANNUAL_LINE_CHARGE,
-    DEFAULT_ENDPOINT,
     ENDPOINT_DISPLAY_NAMES,
-    STATISTIC_TYPES,
+    SENSOR_NAME,
+    SERVICE_BACKFILL,
+    USAGE_WINDOWS,
 )
+from .coordinator import WatercareDataUpdateCoordinator
+from .metrics import WatercareMetrics
+from .processor import WatercareData
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(hours=12)
+
+@dataclass(kw_only=True)
+class WatercareSensorEntityDescription(SensorEntityDescription):
+    """Describe a Watercare sensor and how to read it from coordinator data."""
+
+    value_fn: Callable[[WatercareData], StateType]
+    attributes: bool = False
+
+
+SENSOR_TYPES: tuple[WatercareSensorEntityDescription, ...] = (
+    WatercareSensorEntityDescription(
+        key="usage",
+        name=SENSOR_NAME,
+        icon="mdi:water",
+        native_unit_of_measurement="L",
+        device_class=SensorDeviceClass.WATER,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda data: data.usage,
+        attributes=True,
+    ),
+    WatercareSensorEntityDescription(
+        key="current_period_cost",
+        name=f"{SENSOR_NAME} Current Period Cost",
+        icon="mdi:cash",
+        native_unit_of_measurement="NZD",
+        device_class=SensorDeviceClass.MONETARY,
+        value_fn=lambda data: data.current_period_cost,
+    ),
+    WatercareSensorEntityDescription(
+        key="current_period_cost_consumption",
+        name=f"{SENSOR_NAME} Current Period Consumption Cost",
+        icon="mdi:cash",
+        native_unit_of_measurement="NZD",
+        device_class=SensorDeviceClass.MONETARY,
+        value_fn=lambda data: data.current_period_cost_consumption,
+    ),
+    WatercareSensorEntityDescription(
+        key="current_period_cost_wastewater",
+        name=f"{SENSOR_NAME} Current Period Wastewater Cost",
+        icon="mdi:cash",
+        native_unit_of_measurement="NZD",
+        device_class=SensorDeviceClass.MONETARY,
+        value_fn=lambda data: data.current_period_cost_wastewater,
+    ),
+    WatercareSensorEntityDescription(
+        key="daily_average",
+        name=f"{SENSOR_NAME} Daily Average",
+        icon="mdi:water-outline",
+        native_unit_of_measurement="L",
+        value_fn=lambda data: data.daily_average,
+    ),
+    WatercareSensorEntityDescription(
+        key="household_efficiency_band",
+        name=f"{SENSOR_NAME} Household Efficiency Band",
+        icon="mdi:leaf",
+        value_fn=lambda data: data.household_efficiency_band,
+    ),
+)
+
+
+# Usage and cost over rolling windows, for endpoints with raw readings
+WINDOW_SENSOR_TYPES: tuple[WatercareSensorEntityDescription, ...] = tuple(
+    description
+    for key, name in USAGE_WINDOWS.items()
+    for description in (
+        WatercareSensorEntityDescription(
+            key=key,
+            name=f"{SENSOR_NAME} {name} Usage",
+            icon="mdi:water",
+            native_unit_of_measurement="L",
+            device_class=SensorDeviceClass.WATER,
+            value_fn=lambda data, key=key: data.windows.get(key),
+        ),
+        WatercareSensorEntityDescription(
+            key=f"{key}_cost",
+            name=f"{SENSOR_NAME} {name} Cost",
+            icon="mdi:cash",
+            native_unit_of_measurement="NZD",
+            device_class=SensorDeviceClass.MONETARY,
+            value_fn=lambda data, key=f"{key}_cost": data.windows.get(key),
+        ),
+    )
+)
+
+
+@dataclass(kw_only=True)
+class WatercareDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describe a Watercare diagnostic sensor read from the update metrics."""
+
+    value_fn: Callable[[WatercareMetrics], StateType]
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Convert a duration to whole milliseconds."""
+    return None if seconds is None else round(seconds * 1000)
+
+
+def _seconds(seconds: float | None) -> float | None:
+    """Round a duration for display."""
+    return None if seconds is None else round(seconds, 2)
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[WatercareDiagnosticSensorEntityDescription, ...] = (
+    WatercareDiagnosticSensorEntityDescription(
+        key="last_update_duration",
+        name=f"{SENSOR_NAME} Last Update Duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: _seconds(metrics.last("update")),
+    ),
+    WatercareDiagnosticSensorEntityDescription(
+        key="last_fetch_latency",
+        name=f"{SENSOR_NAME} Last Fetch Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: _milliseconds(metrics.last("fetch")),
+    ),
+)
+
+
+def _device_info(account_number: str) -> DeviceInfo:
+    """Return the device representing a Watercare account."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, account_number)},
+        name=f"{SENSOR_NAME} {account_number}",
+        manufacturer=SENSOR_NAME,
+        entry_type=DeviceEntryType.SERVICE,
+    )
 
 
 async def async_setup_entry(
@@ -43,527 +178,148 @@ async def async_setup_entry(
 ):
     """Set up the Watercare sensor platform."""
 
-    if "api" not in hass.data[DOMAIN]:
-        _LOGGER.error("API instance not found in config entry data.")
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if not entry_data or "coordinator" not in entry_data:
+        _LOGGER.error("Coordinator not found in config entry data.")
         return False
 
-    api = hass.data[DOMAIN]["api"]
-
-    # Get rates and endpoint from config entry data
-    consumption_rate = entry.data.get(CONF_CONSUMPTION_RATE, DEFAULT_CONSUMPTION_RATE)
-    wastewater_rate = entry.data.get(CONF_WASTEWATER_RATE, DEFAULT_WASTEWATER_RATE)
-    wastewater_ratio = entry.data.get(CONF_WASTEWATER_RATIO, DEFAULT_WASTEWATER_RATIO)
-    annual_line_charge = entry.data.get(
-        CONF_ANNUAL_LINE_CHARGE, DEFAULT_ANNUAL_LINE_CHARGE
-    )
-    endpoint = entry.data.get(CONF_ENDPOINT, DEFAULT_ENDPOINT)
-
-    # Check for updated values in options
-    if entry.options:
-        consumption_rate = entry.options.get(CONF_CONSUMPTION_RATE, consumption_rate)
-        wastewater_rate = entry.options.get(CONF_WASTEWATER_RATE, wastewater_rate)
-        wastewater_ratio = entry.options.get(CONF_WASTEWATER_RATIO, wastewater_ratio)
-        annual_line_charge = entry.options.get(
-            CONF_ANNUAL_LINE_CHARGE, annual_line_charge
+    coordinator: WatercareDataUpdateCoordinator = entry_data["coordinator"]
+
+    primary = (coordinator.accounts[0], coordinator.endpoints[0])
+    entities = [
+        WatercareSensor(coordinator, description, *primary)
+        for description in SENSOR_TYPES
+    ]
+    # Other accounts and endpoints only get the sensors their payload can fill
+    for account, endpoint in coordinator.processors:
+        if (account, endpoint) == primary:
+            continue
+        data = (coordinator.data or {}).get((account, endpoint))
+        entities.extend(
+            WatercareSensor(coordinator, description, account, endpoint)
+            for description in SENSOR_TYPES
+            if description.key == "usage"
+            or (data is not None and description.value_fn(data) is not None)
         )
-        endpoint = entry.options.get(CONF_ENDPOINT, endpoint)
-
-    async_add_entities(
-        [
-            WatercareUsageSensor(
-                SENSOR_NAME,
-                api,
-                consumption_rate,
-                wastewater_rate,
-                wastewater_ratio,
-                annual_line_charge,
-                endpoint,
+    for (account, endpoint), processor in coordinator.processors.items():
+        if processor.readings is not None:
+            entities.extend(
+                WatercareSensor(coordinator, description, account, endpoint)
+                for description in WINDOW_SENSOR_TYPES
             )
-        ],
-        True,
+    entities.extend(
+        WatercareDiagnosticSensor(coordinator, description)
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
+    async_add_entities(entities)
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_BACKFILL,
+        {
+            vol.Required("start_date"): cv.date,
+            vol.Optional("end_date"): cv.date,
+        },
+        "async_backfill",
     )
 
 
-class WatercareUsageSensor(SensorEntity):
-    """Define Watercare Usage sensor."""
+class WatercareSensor(CoordinatorEntity[WatercareDataUpdateCoordinator], SensorEntity):
+    """Define a Watercare sensor backed by the shared coordinator."""
+
+    entity_description: WatercareSensorEntityDescription
 
     def __init__(
         self,
-        name,
-        api,
-        consumption_rate,
-        wastewater_rate,
-        wastewater_ratio,
-        annual_line_charge,
-        endpoint,
+        coordinator: WatercareDataUpdateCoordinator,
+        description: WatercareSensorEntityDescription,
+        account_number: str,
+        endpoint: str,
     ):
-        """Initialize Watercare Usage sensor."""
-        self._name = name
-        self._icon = "mdi:water"
-        self._state = None
-        self._unit_of_measurement = "L"
-        self._unique_id = DOMAIN
-        self._device_class = "water"
-        self._state_class = "total_increasing"
-        self._state_attributes = {}
-        self._api = api
-        self._consumption_rate = consumption_rate
-        self._wastewater_rate = wastewater_rate
-        self._wastewater_ratio = wastewater_ratio
-        self._annual_line_charge = annual_line_charge
+        """Initialize the Watercare sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._account_number = account_number
         self._endpoint = endpoint
+        self._attr_device_info = _device_info(account_number)
+
+        primary_account = account_number == coordinator.accounts[0]
+        primary_endpoint = endpoint == coordinator.endpoints[0]
+        if primary_account and primary_endpoint:
+            # The usage sensor keeps the unique id it had before other sensors existed
+            self._attr_unique_id = (
+                DOMAIN if description.key == "usage" else f"{DOMAIN}_{description.key}"
+            )
+            return
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return self._name
+        prefix = SENSOR_NAME
+        if primary_account:
+            self._attr_unique_id = f"{DOMAIN}_{endpoint}_{description.key}"
+        else:
+            self._attr_unique_id = (
+                f"{DOMAIN}_{account_number}_{endpoint}_{description.key}"
+            )
+            prefix += f" {account_number}"
+        if not primary_endpoint:
+            prefix += f" {ENDPOINT_DISPLAY_NAMES[endpoint]}"
+        self._attr_name = description.name.replace(SENSOR_NAME, prefix, 1)
 
     @property
-    def icon(self):
-        """Icon to use in the frontend, if any."""
-        return self._icon
+    def _data(self) -> WatercareData | None:
+        """Return the coordinator data for this sensor's account and endpoint."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.get((self._account_number, self._endpoint))
 
     @property
-    def state(self):
-        """Return the state of the device."""
-        return self._state
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        if (data := self._data) is None:
+            return None
+        return self.entity_description.value_fn(data)
 
     @property
     def extra_state_attributes(self):
         """Return the state attributes of the sensor."""
-        return self._state_attributes
-
-    @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement."""
-        return self._unit_of_measurement
-
-    @property
-    def state_class(self):
-        """Return the state class."""
-        return self._state_class
-
-    @property
-    def device_class(self):
-        """Return the device class."""
-        return self._device_class
-
-    @property
-    def unique_id(self):
-        """Return the unique id."""
-        return self._unique_id
-
-    def _calculate_cost(self, usage_litres, numberOfDays):
-        """Calculate the total cost based on usage and configured rates."""
-        usage_thousands = usage_litres / 1000.0
-
-        # Calculate cost components
-        consumption_cost = usage_thousands * self._consumption_rate
-        wastewater_cost = (
-            usage_thousands * self._wastewater_rate * self._wastewater_ratio
-        )
-        line_charge = (self._annual_line_charge / 365) * numberOfDays
-        total_cost = consumption_cost + wastewater_cost + line_charge
-
-        return {
-            "total": total_cost,
-            "consumption": consumption_cost,
-            "wastewater": wastewater_cost,
-            "line_charge": DEFAULT_ANNUAL_LINE_CHARGE / 365,
-        }
-
-    def _get_statistic_name(self, statistic_type: str) -> str:
-        """Generate consistent statistic names based on endpoint and type."""
-        endpoint_name = ENDPOINT_DISPLAY_NAMES.get(
-            self._endpoint, self._endpoint.title()
-        )
-        type_name = STATISTIC_TYPES.get(statistic_type, statistic_type.title())
-        return f"Watercare {endpoint_name} {type_name}"
-
-    async def async_update(self):
-        """Update the sensor data."""
-        _LOGGER.debug(f"Beginning sensor update using endpoint: {self._endpoint}")
-        response = await self._api.get_data(endpoint=self._endpoint)
-
-        # Route to appropriate processing method based on endpoint
-        if self._endpoint == "dailywithstats":
-            await self.process_daily_data(response)
-        else:
-            # For mechanicalmonthly, monthly, halfhourly - use the billing period processing
-            await self.process_data(response)
-
-    async def process_data(self, response):
-        """Process the API response."""
-        if response is None:
-            _LOGGER.error("No response received from Watercare API; skipping processing")
-            return
-
-        try:
-            billing_periods = json.loads(response)
-        except (TypeError, json.JSONDecodeError) as err:
-            _LOGGER.error("Failed to parse Watercare API response: %s", err)
-            return
-
-        _LOGGER.debug(f"Processing data: {billing_periods}")
-
-        if not billing_periods:
-            _LOGGER.warning("No billing periods found")
-            return
-
-        # Get the most recent billing period for current usage
-        latest_period = billing_periods[0]
-        daily_average = latest_period.get("statistics", {}).get("dailyAverage", 0)
-
-        # Set the sensor state to cumulative usage for Energy Dashboard
-        billing_period_usage = latest_period.get("waterUsage", 0)
-        self._state = billing_period_usage
-
-        numberOfDays = (
-            datetime.strptime(
-                latest_period.get("billingPeriodToDate"), "%Y-%m-%dT%H:%M:%S.%fZ"
-            )
-            - datetime.strptime(
-                latest_period.get("billingPeriodFromDate"), "%Y-%m-%dT%H:%M:%S.%fZ"
-            )
-        ).days + 1
-
-        cost_breakdown = self._calculate_cost(billing_period_usage, numberOfDays)
-
-        self._state_attributes = {
-            "billing_period_usage": billing_period_usage,
-            "daily_average": daily_average,
-            "billing_period_from": latest_period.get("billingPeriodFromDate"),
-            "billing_period_to": latest_period.get("billingPeriodToDate"),
-            "reading_type": latest_period.get("readingType"),
-            "household_efficiency_band": latest_period.get("statistics", {})
-            .get("efficiency", {})
-            .get("currentHouseholdBand"),
-            "current_period_cost": round(cost_breakdown["total"], 2),
-            "current_period_cost_consumption": round(cost_breakdown["consumption"], 2),
-            "current_period_cost_wastewater": round(cost_breakdown["wastewater"], 2),
-            "consumption_rate_per_1000L": self._consumption_rate,
-            "wastewater_rate_per_1000L": self._wastewater_rate,
-            "endpoint": self._endpoint,
-            "cost_currency": "NZD",
-        }
-
-        # Generate external statistics for Energy Dashboard
-        await self.generate_statistics(billing_periods)
-
-    async def generate_statistics(self, billing_periods):
-        """Generate external statistics from billing period data following Energy Dashboard pattern."""
-        if not billing_periods:
-            return
-
-        from homeassistant.components.recorder.models import (
-            StatisticData,
-            StatisticMetaData,
-        )
-        from homeassistant.components.recorder.statistics import (
-            async_add_external_statistics,
-        )
-        import pytz
-
-        period_statistics = []
-        cost_statistics = []
-        consumption_cost_statistics = []
-        wastewater_cost_statistics = []
-        running_sum = 0
-        cost_running_sum = 0
-        consumption_cost_running_sum = 0
-        wastewater_cost_running_sum = 0
-
-        # Sort periods by date (oldest first) for cumulative calculation
-        sorted_periods = sorted(
-            billing_periods, key=lambda x: x.get("billingPeriodToDate", "")
+        attributes = None
+        if self.entity_description.attributes and (data := self._data) is not None:
+            attributes = data.attributes
+        if (self._account_number, self._endpoint) in self.coordinator.stale:
+            # Restored from before a restart and not yet updated
+            return {**(attributes or {}), "stale": True}
+        return attributes
+
+    async def async_backfill(self, start_date, end_date=None):
+        """Import history for this sensor's account and endpoint (service handler)."""
+        await self.coordinator.async_backfill(
+            start_date, end_date, self._endpoint, self._account_number
         )
 
-        for period in sorted_periods:
-            end_date_str = period.get("billingPeriodToDate")
-            if end_date_str:
-                try:
-                    # Parse and convert to NZ timezone
-                    end_date = datetime.strptime(end_date_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-                    end_date = pytz.utc.localize(end_date).astimezone(NZ_TIMEZONE)
-
-                    period_usage = period.get("waterUsage", 0)
-                    running_sum += period_usage
-
-                    numberOfDays = (
-                        datetime.strptime(
-                            period.get("billingPeriodToDate"), "%Y-%m-%dT%H:%M:%S.%fZ"
-                        )
-                        - datetime.strptime(
-                            period.get("billingPeriodFromDate"), "%Y-%m-%dT%H:%M:%S.%fZ"
-                        )
-                    ).days + 1
-
-                    cost_breakdown = self._calculate_cost(period_usage, numberOfDays)
-                    cost_running_sum += cost_breakdown["total"]
-                    consumption_cost_running_sum += cost_breakdown["consumption"]
-                    wastewater_cost_running_sum += cost_breakdown["wastewater"]
-
-                    # Create StatisticData with running sum (critical for Energy Dashboard)
-                    period_statistics.append(
-                        StatisticData(start=end_date, sum=running_sum)
-                    )
-
-                    # Create cost statistics
-                    cost_statistics.append(
-                        StatisticData(start=end_date, sum=cost_running_sum)
-                    )
-
-                    # Create consumption cost statistics if rate is configured
-                    if self._consumption_rate > 0:
-                        consumption_cost_statistics.append(
-                            StatisticData(
-                                start=end_date, sum=consumption_cost_running_sum
-                            )
-                        )
-
-                    # Create wastewater cost statistics if rate is configured
-                    if self._wastewater_rate > 0:
-                        wastewater_cost_statistics.append(
-                            StatisticData(
-                                start=end_date, sum=wastewater_cost_running_sum
-                            )
-                        )
-
-                except (ValueError, TypeError) as e:
-                    _LOGGER.warning(f"Failed to parse date {end_date_str}: {e}")
-                    continue
-
-        if period_statistics:
-            metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Water Consumption",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:water_consumption",
-                unit_of_measurement=self._unit_of_measurement,
-            )
-
-            _LOGGER.debug(
-                f"Adding {len(period_statistics)} water consumption statistics"
-            )
-            async_add_external_statistics(self.hass, metadata, period_statistics)
-        else:
-            _LOGGER.warning("No valid consumption statistics generated")
-
-        if cost_statistics:
-            cost_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Total Cost",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:water_cost",
-                unit_of_measurement="NZD",
-            )
-
-            _LOGGER.debug(f"Adding {len(cost_statistics)} water cost statistics")
-            async_add_external_statistics(self.hass, cost_metadata, cost_statistics)
-        else:
-            _LOGGER.warning("No valid cost statistics generated")
-
-        # Add consumption cost statistics if configured
-        if consumption_cost_statistics and self._consumption_rate > 0:
-            consumption_cost_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Consumption Cost",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:consumption_cost",
-                unit_of_measurement="NZD",
-            )
-
-            _LOGGER.debug(
-                f"Adding {len(consumption_cost_statistics)} consumption cost statistics"
-            )
-            async_add_external_statistics(
-                self.hass, consumption_cost_metadata, consumption_cost_statistics
-            )
-
-        # Add wastewater cost statistics if configured
-        if wastewater_cost_statistics and self._wastewater_rate > 0:
-            wastewater_cost_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Wastewater Cost",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:wastewater_cost",
-                unit_of_measurement="NZD",
-            )
-
-            _LOGGER.debug(
-                f"Adding {len(wastewater_cost_statistics)} wastewater cost statistics"
-            )
-            async_add_external_statistics(
-                self.hass, wastewater_cost_metadata, wastewater_cost_statistics
-            )
-
-    async def process_daily_data(self, response):
-        """Process the daily data."""
-        try:
-            parsed_data = json.loads(response)
-        except json.JSONDecodeError:
-            _LOGGER.error("Failed to parse JSON response for dailywithstats endpoint")
-            return
 
-        _LOGGER.debug(f"Parsed data: {parsed_data}")
-        usage_data = parsed_data.get("usage", [])
-        statistic_data = parsed_data.get("statistics", {})
-
-        litresRunningSum = 0
-        daily_consumption = {}
-
-        for entry in usage_data:
-            timestamp_str = entry.get("timestamp")
-            litres = entry.get("litres", 0)
-            timestamp = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-            timestamp = pytz.utc.localize(timestamp).astimezone(NZ_TIMEZONE)
-            date_str = timestamp.strftime("%Y-%m-%d")
-
-            daily_consumption[date_str] = daily_consumption.get(date_str, 0) + litres
-
-        _LOGGER.debug(f"Daily consumption: {daily_consumption}")
-
-        # Assign yesterday's consumption to state
-        yesterday_date = (datetime.now(NZ_TIMEZONE) - timedelta(days=1)).strftime(
-            "%Y-%m-%d"
-        )
-        yesterday_consumption = daily_consumption.get(yesterday_date, 0)
-        self._state = yesterday_consumption
-        _LOGGER.debug(f"yesterday_consumption: {yesterday_consumption}")
-
-        # Calculate cost for yesterday's consumption
-        cost_breakdown = self._calculate_cost(yesterday_consumption, 1)
-
-        efficiency_data = statistic_data.get("efficiency", {})
-        self._state_attributes = {
-            "yesterday_consumption": yesterday_consumption,
-            "current_period_cost": round(cost_breakdown["total"], 2),
-            "current_period_cost_consumption": round(cost_breakdown["consumption"], 2),
-            "current_period_cost_wastewater": round(cost_breakdown["wastewater"], 2),
-            "consumption_rate_per_1000L": self._consumption_rate,
-            "wastewater_rate_per_1000L": self._wastewater_rate,
-            "endpoint": self._endpoint,
-            "cost_currency": "NZD",
-            "currentPeriodAverage": statistic_data.get("currentPeriodAverage"),
-            "differenceToPreviousPeriod": statistic_data.get(
-                "differenceToPreviousPeriod"
-            ),
-            "currentHouseholdBand": efficiency_data.get("currentHouseholdBand"),
-            "usageToLowerBand": efficiency_data.get("usageToLowerBand"),
-        }
-
-        # Generate statistics for daily data
-        day_statistics = []
-        cost_statistics = []
-        consumption_cost_statistics = []
-        wastewater_cost_statistics = []
-        running_cost_sum = 0
-        consumption_cost_running_sum = 0
-        wastewater_cost_running_sum = 0
-        first = True
-
-        for date, litres in daily_consumption.items():
-            start = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=NZ_TIMEZONE)
-
-            # HASSIO statistics requires us to add values as a sum of all previous values.
-            litresRunningSum += litres
-
-            # Calculate cost for this day
-            daily_cost_breakdown = self._calculate_cost(litres, 1)
-            running_cost_sum += daily_cost_breakdown["total"]
-            consumption_cost_running_sum += daily_cost_breakdown["consumption"]
-            wastewater_cost_running_sum += daily_cost_breakdown["wastewater"]
-
-            if first:
-                reset = start
-                first = False
-
-            # Add consumption statistics
-            day_statistics.append(
-                StatisticData(start=start, sum=litresRunningSum, last_reset=reset)
-            )
-
-            # Add cost statistics
-            cost_statistics.append(StatisticData(start=start, sum=running_cost_sum))
-
-            # Add consumption cost statistics if rate is configured
-            if self._consumption_rate > 0:
-                consumption_cost_statistics.append(
-                    StatisticData(start=start, sum=consumption_cost_running_sum)
-                )
-
-            # Add wastewater cost statistics if rate is configured
-            if self._wastewater_rate > 0:
-                wastewater_cost_statistics.append(
-                    StatisticData(start=start, sum=wastewater_cost_running_sum)
-                )
-
-        # Add daily consumption statistics
-        if day_statistics:
-            day_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name=self._get_statistic_name("consumption"),
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:daily_consumption",
-                unit_of_measurement=self._unit_of_measurement,
-            )
-
-            _LOGGER.debug(f"Adding {len(day_statistics)} daily consumption statistics")
-            async_add_external_statistics(self.hass, day_metadata, day_statistics)
-        else:
-            _LOGGER.warning("No daily statistics found, skipping update")
-
-        # Add daily cost statistics
-        if cost_statistics:
-            cost_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Daily Cost",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:daily_cost",
-                unit_of_measurement="NZD",
-            )
+class WatercareDiagnosticSensor(
+    CoordinatorEntity[WatercareDataUpdateCoordinator], SensorEntity
+):
+    """Define a diagnostic sensor reporting how long updates take."""
 
-            _LOGGER.debug(f"Adding {len(cost_statistics)} daily cost statistics")
-            async_add_external_statistics(self.hass, cost_metadata, cost_statistics)
-
-        # Add daily consumption cost statistics if configured
-        if consumption_cost_statistics and self._consumption_rate > 0:
-            consumption_cost_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Daily Consumption Cost",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:daily_consumption_cost",
-                unit_of_measurement="NZD",
-            )
+    entity_description: WatercareDiagnosticSensorEntityDescription
 
-            _LOGGER.debug(
-                f"Adding {len(consumption_cost_statistics)} daily consumption cost statistics"
-            )
-            async_add_external_statistics(
-                self.hass, consumption_cost_metadata, consumption_cost_statistics
-            )
+    def __init__(
+        self,
+        coordinator: WatercareDataUpdateCoordinator,
+        description: WatercareDiagnosticSensorEntityDescription,
+    ):
+        """Initialize the diagnostic sensor on the primary account's device."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{DOMAIN}_{description.key}"
+        self._attr_device_info = _device_info(coordinator.accounts[0])
 
-        # Add daily wastewater cost statistics if configured
-        if wastewater_cost_statistics and self._wastewater_rate > 0:
-            wastewater_cost_metadata = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                name="Watercare Daily Wastewater Cost",
-                source=DOMAIN,
-                statistic_id=f"{DOMAIN}:daily_wastewater_cost",
-                unit_of_measurement="NZD",
-            )
+    @property
+    def available(self) -> bool:
+        """Return True once there is something to report."""
+        return super().available and self.native_value is not None
 
-            _LOGGER.debug(
-                f"Adding {len(wastewater_cost_statistics)} daily wastewater cost statistics"
-            )
-            async_add_external_statistics(
-                self.hass, wastewater_cost_metadata, wastewater_cost_statistics
-            )
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.metrics)
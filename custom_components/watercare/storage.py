@@ -0,0 +1,45 @@
+"""Persistent storage for the Watercare integration."""
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+
+class WatercareStore:
+    """Per config entry store holding state that should survive restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialise the store."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._data: dict[str, Any] = {}
+
+    async def async_load(self):
+        """Load the stored data from disk."""
+        self._data = await self._store.async_load() or {}
+        _LOGGER.debug(f"Loaded stored sections: {list(self._data)}")
+
+    def get(self, section: str, default: Any = None) -> Any:
+        """Return a stored section."""
+        return self._data.get(section, default)
+
+    def async_set(self, section: str, value: Any):
+        """Update a section and schedule a delayed write."""
+        self._data[section] = value
+        self._store.async_delay_save(lambda: self._data, SAVE_DELAY)
+
+    async def async_save(self):
+        """Write the data to disk immediately."""
+        await self._store.async_save(self._data)
+
+    async def async_remove(self):
+        """Remove the stored data from disk."""
+        await self._store.async_remove()
@@ -0,0 +1,173 @@
+"""Incremental decoding of large usage responses."""
+
+from collections.abc import Callable
+import codecs
+import json
+import re
+from typing import Any
+
+_SKIP = re.compile(r"[\s,]*")
+
+# Decoder states
+_START = "start"
+_KEY = "key"
+_VALUE = "value"
+_ARRAY = "array"
+_DONE = "done"
+
+
+class UsageStreamDecoder:
+    """Decode a usage response chunk by chunk, handing over readings as they complete.
+
+    Accepts either ``{"usage": [...], ...}`` or a bare list of readings.
+    Each reading is decoded on its own with ``json.JSONDecoder.raw_decode``
+    and passed to ``on_entries`` in batches, one batch per fed chunk, so only
+    the undecoded tail of the body is buffered. Other top-level members are
+    small and are collected for ``close`` to return. Raises ``ValueError``
+    on malformed input.
+    """
+
+    def __init__(
+        self,
+        on_entries: Callable[[list[dict[str, Any]]], None],
+        on_reset: Callable[[], None] | None = None,
+    ):
+        """Initialise the decoder."""
+        self._on_entries = on_entries
+        self._on_reset = on_reset
+        self._decoder = json.JSONDecoder()
+        self.reset()
+
+    def reset(self):
+        """Discard everything decoded so far, e.g. before a retried request."""
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _START
+        self._key: str | None = None
+        self._rest: dict[str, Any] = {}
+        self.entries = 0
+        if self._on_reset is not None:
+            self._on_reset()
+
+    def feed(self, chunk: bytes):
+        """Decode a chunk of the body."""
+        self._buffer += self._text.decode(chunk)
+        self._drain(final=False)
+
+    def close(self) -> dict[str, Any]:
+        """Finish decoding and return the top-level members other than usage."""
+        self._buffer += self._text.decode(b"", final=True)
+        self._drain(final=True)
+        if self._state != _DONE:
+            raise ValueError("Usage response ended unexpectedly")
+        return self._rest
+
+    def _value(self, pos: int, final: bool) -> tuple[Any, int] | None:
+        """Decode the value at pos, or return None if it may be incomplete."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        # A number cut short by the chunk boundary still has digits, a
+        # fraction or an exponent to come
+        if not final and (end == len(self._buffer) or self._buffer[end] in ".eE"):
+            return None
+        return value, end
+
+    def _entries(self, buffer: str, pos: int, batch: list, final: bool) -> int:
+        """Decode consecutive array elements into batch, returning the new position.
+
+        Readings are objects, which ``raw_decode`` can only finish at their
+        closing brace, so they need none of the end-of-buffer care of ``_value``.
+        """
+        raw_decode = self._decoder.raw_decode
+        skip = _SKIP.match
+        end_of_buffer = len(buffer)
+        while pos < end_of_buffer and buffer[pos] == "{":
+            try:
+                entry, end = raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                return pos
+            batch.append(entry)
+            pos = skip(buffer, end).end()
+        if pos < end_of_buffer and buffer[pos] not in "]{":
+            # Not a reading object; decode it the general way
+            decoded = self._value(pos, final)
+            if decoded is None:
+                return pos
+            entry, end = decoded
+            batch.append(entry)
+            pos = skip(buffer, end).end()
+        return pos
+
+    def _drain(self, final: bool):
+        """Decode as much of the buffer as is complete."""
+        buffer = self._buffer
+        pos = 0
+        batch = []
+
+        while True:
+            pos = _SKIP.match(buffer, pos).end()
+            if pos == len(buffer) or self._state == _DONE:
+                break
+            char = buffer[pos]
+
+            if self._state == _START:
+                if char == "[":
+                    self._state = _ARRAY
+                    self._key = None
+                elif char == "{":
+                    self._state = _KEY
+                else:
+                    raise ValueError(f"Unexpected start of usage response: {char!r}")
+                pos += 1
+
+            elif self._state == _KEY:
+                if char == "}":
+                    self._state = _DONE
+                    pos += 1
+                    continue
+                decoded = self._value(pos, final)
+                if decoded is None:
+                    break
+                key, end = decoded
+                colon = _SKIP.match(buffer, end).end()
+                if colon == len(buffer):
+                    break
+                if buffer[colon] != ":":
+                    raise ValueError("Expected ':' in usage response")
+                self._key = key
+                self._state = _VALUE
+                pos = colon + 1
+
+            elif self._state == _VALUE:
+                if self._key == "usage" and char == "[":
+                    self._state = _ARRAY
+                    pos += 1
+                    continue
+                decoded = self._value(pos, final)
+                if decoded is None:
+                    break
+                self._rest[self._key], pos = decoded
+                self._state = _KEY
+
+            elif self._state == _ARRAY:
+                if char == "]":
+                    # The usage array ends the document when it is the body itself
+                    self._state = _KEY if self._key == "usage" else _DONE
+                    pos += 1
+                    continue
+                end = self._entries(buffer, pos, batch, final)
+                if end == pos:
+                    # The next element is incomplete
+                    break
+                pos = end
+
+        self._buffer = buffer[pos:]
+        if batch:
+            self.entries += len(batch)
+            self._on_entries(batch)
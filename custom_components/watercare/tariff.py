@@ -0,0 +1,197 @@
+"""Effective-dated Watercare tariffs and cost calculation."""
+
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time
+import logging
+from typing import Any
+
+from .const import NZ_TIMEZONE
+from .storage import WatercareStore
+
+_LOGGER = logging.getLogger(__name__)
+
+STORE_SECTION = "tariffs"
+
+
+@dataclass(frozen=True)
+class Tariff:
+    """Rates in effect from a NZ calendar day until the next tariff.
+
+    ``effective_from`` is an ISO date, or empty for the tariff that applies
+    before any dated one.
+    """
+
+    effective_from: str
+    consumption_rate: float
+    wastewater_rate: float
+    wastewater_ratio: float
+    annual_line_charge: float
+
+    @property
+    def start(self) -> float:
+        """Return the epoch timestamp of NZ midnight on the effective date."""
+        if not self.effective_from:
+            return float("-inf")
+        day = date.fromisoformat(self.effective_from)
+        return NZ_TIMEZONE.localize(datetime.combine(day, time())).timestamp()
+
+    def per_litre(self) -> tuple[float, float, float]:
+        """Return the consumption and wastewater costs per litre, and per day charge."""
+        return (
+            self.consumption_rate / 1000.0,
+            self.wastewater_rate * self.wastewater_ratio / 1000.0,
+            self.annual_line_charge / 365,
+        )
+
+    def same_rates(self, other: "Tariff") -> bool:
+        """Return True if both tariffs charge the same."""
+        return self.per_litre() == other.per_litre()
+
+
+class TariffSchedule:
+    """Tariffs ordered by effective date, looked up by binary search."""
+
+    def __init__(self, tariffs: Iterable[Tariff]):
+        """Initialise the schedule; later dates supersede earlier ones."""
+        by_date = {tariff.effective_from: tariff for tariff in tariffs}
+        self.tariffs = sorted(by_date.values(), key=lambda t: t.start)
+        if not self.tariffs:
+            raise ValueError("A tariff schedule needs at least one tariff")
+        self._starts = [tariff.start for tariff in self.tariffs]
+
+    @classmethod
+    def from_list(cls, tariffs: Iterable[Mapping[str, Any]]) -> "TariffSchedule":
+        """Create a schedule from persisted tariffs."""
+        return cls(Tariff(**tariff) for tariff in tariffs)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the tariffs for persisting."""
+        return [asdict(tariff) for tariff in self.tariffs]
+
+    def with_tariff(self, tariff: Tariff) -> "TariffSchedule":
+        """Return the schedule with a tariff added or replaced.
+
+        A dated tariff with the same rates as the one already in effect on its
+        date is redundant and is not added.
+        """
+        if tariff.effective_from and tariff.same_rates(self.at(tariff.start)):
+            return self
+        return TariffSchedule([*self.tariffs, tariff])
+
+    def _index(self, timestamp: float) -> int:
+        """Return the index of the tariff in effect at a timestamp."""
+        # Times before the earliest tariff are charged at the earliest rates
+        return max(bisect_right(self._starts, timestamp) - 1, 0)
+
+    def at(self, timestamp: float) -> Tariff:
+        """Return the tariff in effect at a timestamp."""
+        return self.tariffs[self._index(timestamp)]
+
+    def charges_consumption(self) -> bool:
+        """Return True if any tariff has a consumption rate."""
+        return any(tariff.consumption_rate > 0 for tariff in self.tariffs)
+
+    def charges_wastewater(self) -> bool:
+        """Return True if any tariff has a wastewater rate."""
+        return any(tariff.wastewater_rate > 0 for tariff in self.tariffs)
+
+    def cost(self, usage_litres: float, days: float, timestamp: float) -> dict:
+        """Return the cost breakdown of usage over days from a timestamp."""
+        consumption_rate, wastewater_rate, daily_line_charge = self.at(
+            timestamp
+        ).per_litre()
+        consumption = usage_litres * consumption_rate
+        wastewater = usage_litres * wastewater_rate
+        line_charge = daily_line_charge * days
+        return {
+            "total": consumption + wastewater + line_charge,
+            "consumption": consumption,
+            "wastewater": wastewater,
+            "line_charge": line_charge,
+        }
+
+    def cost_between(
+        self, start: float, end: float, usage: Callable[[float, float], float]
+    ) -> dict:
+        """Return the cost breakdown of the usage from start until end.
+
+        ``usage`` returns the litres used between two timestamps. The range is
+        split where tariffs change, so each part is costed at its own rates.
+        """
+        breakdown = dict.fromkeys(
+            ("total", "consumption", "wastewater", "line_charge"), 0.0
+        )
+        index = self._index(start)
+        while start < end:
+            part_end = end
+            if index + 1 < len(self._starts):
+                part_end = min(end, self._starts[index + 1])
+            part = self.cost(usage(start, part_end), (part_end - start) / 86400, start)
+            for key, value in part.items():
+                breakdown[key] += value
+            start = part_end
+            index += 1
+        return breakdown
+
+    def cost_series(self, buckets) -> dict[str, list[float]]:
+        """Return cost breakdowns for ``(start, litres, days)`` buckets.
+
+        Buckets must be oldest first. The schedule is searched once for the
+        first bucket and then walked forward alongside the buckets, so each
+        row costs a few multiplications rather than a lookup and call.
+        """
+        totals = []
+        consumption_costs = []
+        wastewater_costs = []
+        starts = self._starts
+        # Forces the lookup for the first bucket
+        next_start = float("-inf")
+
+        for start, litres, days in buckets:
+            timestamp = start.timestamp()
+            if timestamp >= next_start:
+                index = self._index(timestamp)
+                next_start = (
+                    starts[index + 1] if index + 1 < len(starts) else float("inf")
+                )
+                consumption_rate, wastewater_rate, daily_line_charge = self.tariffs[
+                    index
+                ].per_litre()
+
+            consumption = litres * consumption_rate
+            wastewater = litres * wastewater_rate
+            consumption_costs.append(consumption)
+            wastewater_costs.append(wastewater)
+            totals.append(consumption + wastewater + daily_line_charge * days)
+
+        return {
+            "total": totals,
+            "consumption": consumption_costs,
+            "wastewater": wastewater_costs,
+        }
+
+
+def async_load_tariffs(store: WatercareStore, configured: Tariff) -> TariffSchedule:
+    """Return the persisted schedule updated with the configured tariff.
+
+    The configured rates replace the base tariff when they have no effective
+    date, and are added as a new tariff from their date otherwise, so earlier
+    rates keep applying to earlier usage.
+    """
+    stored = store.get(STORE_SECTION)
+    try:
+        schedule = TariffSchedule.from_list(stored) if stored else None
+    except (TypeError, ValueError) as err:
+        _LOGGER.warning(f"Ignoring invalid stored tariffs: {err}")
+        schedule = None
+
+    schedule = (
+        TariffSchedule([configured])
+        if schedule is None
+        else schedule.with_tariff(configured)
+    )
+    if schedule.as_list() != stored:
+        store.async_set(STORE_SECTION, schedule.as_list())
+    return schedule
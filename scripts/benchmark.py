@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Benchmark the Watercare processing paths against synthetic payloads.
+
+Generates realistic payloads for each endpoint, from a day to several years
+of readings, and times the processor methods with the recorder stubbed out,
+as well as decoding the encoded payloads with each available JSON backend.
+Reports the best of several runs as readings per second, and the peak memory
+allocated by a single run.
+
+    scripts/benchmark.py                       # run every case
+    scripts/benchmark.py -k halfhourly         # only matching cases
+    scripts/benchmark.py --save baseline.json  # record results
+    scripts/benchmark.py --compare baseline.json
+
+With ``--compare`` the script exits non-zero if any case got more than
+``--threshold`` percent slower than the saved baseline.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from functools import partial
+import json
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Any
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.watercare import processor  # noqa: E402
+from custom_components.watercare.codec import orjson  # noqa: E402
+from custom_components.watercare.processor import (  # noqa: E402
+    WatercareEndpointProcessor,
+)
+from custom_components.watercare.tariff import Tariff, TariffSchedule  # noqa: E402
+from fixtures import billing_payload, daily_payload, halfhourly_payload  # noqa: E402
+
+# The default rates, from the beginning of time
+TARIFF = Tariff("", 2.296, 3.994, 0.785, 310)
+
+
+@dataclass
+class Result:
+    """Timing and memory of one benchmark case."""
+
+    name: str
+    readings: int
+    seconds: float
+    readings_per_second: float
+    peak_kib: float
+    rows_written: int
+
+
+class _ExecutorHass:
+    """Just enough of Home Assistant for the processor to use its executor."""
+
+    async def async_add_executor_job(self, target, *args):
+        """Run a job in the default executor, as Home Assistant does."""
+        return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+def _processor(endpoint: str) -> WatercareEndpointProcessor:
+    """Return a processor with default rates and no recorder attached."""
+    return WatercareEndpointProcessor(
+        _ExecutorHass(), None, None, endpoint, TariffSchedule([TARIFF])
+    )
+
+
+def _decoders() -> dict[str, Callable[[bytes], Any]]:
+    """Return the JSON backends to compare, by name."""
+    decoders = {"json": json.loads}
+    if orjson is not None:
+        decoders["orjson"] = orjson.loads
+    return decoders
+
+
+def _cases() -> list[tuple[str, str, Callable[[], Any], int, str]]:
+    """Return (name, endpoint, payload factory, readings, method) cases."""
+    cases = []
+    for days, label in ((1, "1d"), (30, "30d"), (365, "1y"), (5 * 365, "5y")):
+        cases.append(
+            (
+                f"halfhourly/{label}/process_halfhourly_data",
+                "halfhourly",
+                lambda days=days: halfhourly_payload(days),
+                days * 48,
+                "process_halfhourly_data",
+            )
+        )
+    for days, label in ((365, "1y"), (5 * 365, "5y")):
+        cases.append(
+            (
+                f"dailywithstats/{label}/process_daily_data",
+                "dailywithstats",
+                lambda days=days: daily_payload(days),
+                days,
+                "process_daily_data",
+            )
+        )
+    for years in (10, 50):
+        for method in ("process_data", "generate_statistics"):
+            cases.append(
+                (
+                    f"mechanicalmonthly/{years}y/{method}",
+                    "mechanicalmonthly",
+                    lambda years=years: billing_payload(years),
+                    years * 6,
+                    method,
+                )
+            )
+    return cases
+
+
+def _decode_cases() -> list[tuple[str, Callable[[], Any], int, str]]:
+    """Return (name, payload factory, readings, backend) decoding cases."""
+    payloads = [
+        ("halfhourly/30d", lambda: halfhourly_payload(30), 30 * 48),
+        ("halfhourly/5y", lambda: halfhourly_payload(5 * 365), 5 * 365 * 48),
+        ("dailywithstats/5y", lambda: daily_payload(5 * 365), 5 * 365),
+        ("mechanicalmonthly/50y", lambda: billing_payload(50), 50 * 6),
+    ]
+    return [
+        (f"{label}/decode/{backend}", factory, readings, backend)
+        for label, factory, readings in payloads
+        for backend in _decoders()
+    ]
+
+
+def run_decode_case(
+    name: str,
+    payload_factory: Callable[[], Any],
+    readings: int,
+    backend: str,
+    repeat: int,
+) -> Result:
+    """Time decoding an encoded payload from bytes with one JSON backend."""
+    body = json.dumps(payload_factory()).encode()
+    loads = _decoders()[backend]
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loads(body)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    loads(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return Result(
+        name=name,
+        readings=readings,
+        seconds=best,
+        readings_per_second=readings / best if best else float("inf"),
+        peak_kib=peak / 1024,
+        rows_written=0,
+    )
+
+
+def run_case(
+    name: str,
+    endpoint: str,
+    payload_factory: Callable[[], Any],
+    readings: int,
+    method: str,
+    repeat: int,
+) -> Result:
+    """Time one processor method against a generated payload."""
+    payload = payload_factory()
+    rows_written = 0
+
+    def record_rows(hass, metadata, statistics):
+        nonlocal rows_written
+        rows_written += len(statistics)
+
+    loop = asyncio.new_event_loop()
+    try:
+        with patch.object(processor, "async_add_external_statistics", record_rows):
+            timings = []
+            for _ in range(repeat):
+                target = getattr(_processor(endpoint), method)
+                start = time.perf_counter()
+                loop.run_until_complete(target(payload, {}))
+                timings.append(time.perf_counter() - start)
+
+            rows_per_run = rows_written // repeat
+            target = getattr(_processor(endpoint), method)
+            tracemalloc.start()
+            loop.run_until_complete(target(payload, {}))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        loop.close()
+
+    best = min(timings)
+    return Result(
+        name=name,
+        readings=readings,
+        seconds=best,
+        readings_per_second=readings / best if best else float("inf"),
+        peak_kib=peak / 1024,
+        rows_written=rows_per_run,
+    )
+
+
+def main() -> int:
+    """Run the benchmarks and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="filter", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--save", type=Path, help="write results to a JSON file")
+    parser.add_argument("--compare", type=Path, help="compare with saved results")
+    parser.add_argument(
+        "--threshold", type=float, default=20, help="allowed slowdown in percent"
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        baseline = {r["name"]: r for r in json.loads(args.compare.read_text())}
+
+    results = []
+    regressions = []
+    print(
+        f"{'case':<48} {'readings':>9} {'best ms':>10} {'readings/s':>12} "
+        f"{'peak KiB':>10} {'vs base':>8}"
+    )
+    cases = [
+        (name, readings, partial(run_case, name, endpoint, factory, readings, method))
+        for name, endpoint, factory, readings, method in _cases()
+    ] + [
+        (name, readings, partial(run_decode_case, name, factory, readings, backend))
+        for name, factory, readings, backend in _decode_cases()
+    ]
+    for name, readings, run in cases:
+        if args.filter and args.filter not in name:
+            continue
+        result = run(repeat=args.repeat)
+        results.append(result)
+
+        change = ""
+        if name in baseline:
+            ratio = result.seconds / baseline[name]["seconds"] - 1
+            change = f"{ratio:+.0%}"
+            if ratio * 100 > args.threshold:
+                regressions.append(name)
+        print(
+            f"{name:<48} {readings:>9} {result.seconds * 1000:>10.2f} "
+            f"{result.readings_per_second:>12,.0f} {result.peak_kib:>10,.0f} "
+            f"{change:>8}"
+        )
+
+    if args.save:
+        args.save.write_text(json.dumps([asdict(r) for r in results], indent=2))
+
+    if regressions:
+        print(f"\nSlower than baseline by more than {args.threshold}%:")
+        for name in regressions:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
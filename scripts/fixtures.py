@@ -0,0 +1,69 @@
+"""Synthetic Watercare API payloads for the developer scripts."""
+
+from datetime import datetime, timedelta, timezone
+import random
+
+# Fixtures end on a fixed day so results do not drift with the calendar
+FIXTURE_END = datetime(2025, 1, 1, 11, 0, tzinfo=timezone.utc)
+
+
+def timestamp(moment: datetime) -> str:
+    """Format a time the way the API does."""
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def halfhourly_payload(days: int, end: datetime = FIXTURE_END) -> dict:
+    """Return a half-hourly usage payload covering the days before ``end``."""
+    rng = random.Random(days)
+    start = end - timedelta(days=days)
+    return {
+        "usage": [
+            {
+                "timestamp": timestamp(start + timedelta(minutes=30 * i)),
+                "litres": round(rng.uniform(0, 40), 1),
+            }
+            for i in range(days * 48)
+        ]
+    }
+
+
+def daily_payload(days: int, end: datetime = FIXTURE_END) -> dict:
+    """Return a dailywithstats payload covering the days before ``end``."""
+    rng = random.Random(days)
+    start = end - timedelta(days=days)
+    return {
+        "usage": [
+            {
+                "timestamp": timestamp(start + timedelta(days=i)),
+                "litres": rng.randint(150, 900),
+            }
+            for i in range(days)
+        ],
+        "statistics": {
+            "currentPeriodAverage": 420,
+            "differenceToPreviousPeriod": -3.5,
+            "efficiency": {"currentHouseholdBand": "B", "usageToLowerBand": 25},
+        },
+    }
+
+
+def billing_payload(years: int, end: datetime = FIXTURE_END) -> list:
+    """Return billing periods covering the years before ``end``, newest first."""
+    rng = random.Random(years)
+    periods = []
+    for _ in range(years * 6):
+        start = end - timedelta(days=rng.randint(55, 65))
+        periods.append(
+            {
+                "billingPeriodFromDate": timestamp(start),
+                "billingPeriodToDate": timestamp(end - timedelta(days=1)),
+                "waterUsage": rng.randint(20000, 60000),
+                "readingType": "Actual",
+                "statistics": {
+                    "dailyAverage": 450,
+                    "efficiency": {"currentHouseholdBand": "C"},
+                },
+            }
+        )
+        end = start
+    return periods
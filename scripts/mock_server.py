@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Watercare API and its Azure B2C login.
+
+Emulates the B2C authorize page (with its ``var SETTINGS = {...};`` line),
+SelfAsserted, the confirmed redirect, the authorization code and refresh
+token grants, ``v1/account`` and the four usage endpoints. Latency, error
+rates and payload sizes are configurable.
+
+    scripts/mock_server.py --port 8099 --latency 200 --error-rate 0.05
+    scripts/mock_server.py --drive --polls 200 --accounts 3
+
+``--drive`` starts the server in-process and runs WatercareApi against it,
+reporting login latency, polling throughput and failure handling.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+from pathlib import Path
+import random
+import secrets
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.watercare.api import WatercareApi  # noqa: E402
+from custom_components.watercare.cache import ResponseCache  # noqa: E402
+from fixtures import billing_payload, daily_payload, halfhourly_payload  # noqa: E402
+
+POLICY_PATH = "/tfp/mock.onmicrosoft.com"
+USERNAME = "user@example.com"
+PASSWORD = "password"
+ENDPOINTS = ["halfhourly", "dailywithstats", "monthly", "mechanicalmonthly"]
+
+
+class MockWatercare:
+    """In-memory state and request handlers of the mock service."""
+
+    def __init__(self, args: argparse.Namespace):
+        """Initialise the mock from command line options."""
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.accounts = [f"10000{i:05d}" for i in range(args.accounts)]
+        self.transactions: dict[str, str] = {}
+        self.codes: set[str] = set()
+        self.access_tokens: dict[str, float] = {}
+        self.refresh_tokens: set[str] = set()
+        self.bodies: dict[tuple, tuple[str, str]] = {}
+        self.requests = 0
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        """Apply latency and injected failures to every request."""
+        self.requests += 1
+        delay = self.args.latency + self.rng.uniform(0, self.args.jitter)
+        await asyncio.sleep(delay / 1000)
+        if self.rng.random() < self.args.error_rate:
+            raise web.HTTPServiceUnavailable(text="Injected failure")
+        if self.rng.random() < self.args.rate_limit_rate:
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "1"})
+        return await handler(request)
+
+    def routes(self) -> list[web.RouteDef]:
+        """Return the routes of the mock service."""
+        return [
+            web.get(POLICY_PATH + "/{policy}/oAuth2/v2.0/authorize", self.authorize),
+            web.post(POLICY_PATH + "/{policy}/SelfAsserted", self.self_asserted),
+            web.get(
+                POLICY_PATH + "/{policy}/api/CombinedSigninAndSignup/confirmed",
+                self.confirmed,
+            ),
+            web.get(POLICY_PATH + "/{policy}/oauth2/v2.0/token", self.token),
+            web.post(POLICY_PATH + "/{policy}/oauth2/v2.0/token", self.token),
+            web.get("/v1/account", self.account),
+            web.get("/v1/usage/{account}/{endpoint}", self.usage),
+        ]
+
+    async def authorize(self, request: web.Request) -> web.Response:
+        """Return the sign-in page with its embedded settings."""
+        trans_id = f"StateProperties={secrets.token_urlsafe(16)}"
+        csrf = secrets.token_urlsafe(16)
+        self.transactions[trans_id] = csrf
+        settings = json.dumps({"transId": trans_id, "csrf": csrf})
+        page = f"<html>\n<script>\nvar SETTINGS = {settings};\n</script>\n</html>"
+        response = web.Response(text=page, content_type="text/html")
+        response.set_cookie("x-ms-cpim-trans", trans_id)
+        return response
+
+    async def self_asserted(self, request: web.Request) -> web.Response:
+        """Check the submitted credentials for a sign-in transaction."""
+        form = await request.post()
+        trans_id = request.query.get("tx")
+        if self.transactions.get(trans_id) != request.headers.get("X-CSRF-TOKEN"):
+            return web.json_response({"status": "400", "message": "Bad csrf"})
+        if form.get("email") != USERNAME or form.get("password") != PASSWORD:
+            self.transactions[trans_id] = None
+            return web.json_response({"status": "400", "message": "Bad password"})
+        return web.json_response({"status": "200"})
+
+    async def confirmed(self, request: web.Request) -> web.Response:
+        """Redirect back to the app with an authorization code or an error."""
+        redirect = "msauth://nz.co.watercare/mock"
+        if not self.transactions.pop(request.query.get("tx"), None):
+            location = f"{redirect}?error=access_denied&error_description=Denied"
+        else:
+            code = secrets.token_urlsafe(24)
+            self.codes.add(code)
+            location = f"{redirect}?code={code}"
+        raise web.HTTPFound(location)
+
+    async def token(self, request: web.Request) -> web.Response:
+        """Redeem an authorization code or refresh token."""
+        params = dict(request.query)
+        if request.method == "POST":
+            params.update(await request.post())
+
+        grant = params.get("grant_type")
+        if grant == "authorization_code" and params.get("code") in self.codes:
+            self.codes.discard(params["code"])
+        elif (
+            grant == "refresh_token"
+            and params.get("refresh_token") in self.refresh_tokens
+        ):
+            self.refresh_tokens.discard(params["refresh_token"])
+        else:
+            return web.json_response({"error": "invalid_grant"}, status=400)
+
+        access_token = secrets.token_urlsafe(32)
+        refresh_token = secrets.token_urlsafe(32)
+        self.access_tokens[access_token] = time.time() + self.args.token_lifetime
+        self.refresh_tokens.add(refresh_token)
+        return web.json_response(
+            {
+                "access_token": access_token,
+                "expires_in": self.args.token_lifetime,
+                "refresh_token": refresh_token,
+                "refresh_token_expires_in": 14 * 24 * 3600,
+                "token_type": "Bearer",
+            }
+        )
+
+    def _authorized(self, request: web.Request) -> bool:
+        """Return True if the request carries a live access token."""
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        return self.access_tokens.get(token, 0) > time.time()
+
+    async def account(self, request: web.Request) -> web.Response:
+        """Return the accounts of the signed-in user."""
+        if not self._authorized(request):
+            raise web.HTTPUnauthorized()
+        return web.json_response(
+            [{"accountNumber": account} for account in self.accounts]
+        )
+
+    async def usage(self, request: web.Request) -> web.Response:
+        """Return usage for an account and endpoint, honouring If-None-Match."""
+        if not self._authorized(request):
+            raise web.HTTPUnauthorized()
+        account = request.match_info["account"]
+        endpoint = request.match_info["endpoint"]
+        if account not in self.accounts or endpoint not in ENDPOINTS:
+            raise web.HTTPNotFound()
+
+        key = (account, endpoint, request.query.get("from"), request.query.get("to"))
+        if key not in self.bodies:
+            body = json.dumps(self._payload(endpoint, key[2], key[3]))
+            etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+            self.bodies[key] = (body, etag)
+        body, etag = self.bodies[key]
+
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            text=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    def _payload(self, endpoint: str, start: str | None, end: str | None):
+        """Generate the payload for an endpoint and optional date range."""
+        if start and end:
+            since = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+            until = datetime.fromisoformat(end).replace(tzinfo=timezone.utc)
+            days = max((until - since).days, 1)
+        else:
+            until = datetime.now(timezone.utc).replace(
+                hour=11, minute=0, second=0, microsecond=0
+            ) - timedelta(days=1)
+            days = self.args.days
+
+        if endpoint == "halfhourly":
+            return halfhourly_payload(days, until)
+        if endpoint == "dailywithstats":
+            return daily_payload(days, until)
+        return billing_payload(self.args.years, until)
+
+
+def build_app(mock: MockWatercare) -> web.Application:
+    """Return the aiohttp application serving the mock."""
+    app = web.Application(middlewares=[mock.middleware])
+    app.add_routes(mock.routes())
+    return app
+
+
+async def drive(mock: MockWatercare, args: argparse.Namespace):
+    """Run WatercareApi against the mock and report what it measured."""
+    runner = web.AppRunner(build_app(mock))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    urls = {
+        "url_base": f"http://127.0.0.1:{port}/",
+        "url_token_base": f"http://127.0.0.1:{port}{POLICY_PATH}",
+    }
+
+    try:
+        logins = []
+        for _ in range(args.logins):
+            api = WatercareApi(USERNAME, PASSWORD, **urls)
+            start = time.perf_counter()
+            ok = await api.async_ensure_token()
+            logins.append(time.perf_counter() - start)
+            await api.async_close()
+            if not ok:
+                print("Login failed")
+                return
+        logins.sort()
+        print(
+            f"Login: {len(logins)} runs, median {logins[len(logins) // 2] * 1000:.0f} ms, "
+            f"max {logins[-1] * 1000:.0f} ms"
+        )
+
+        # Caching is disabled so every poll reaches the server
+        api = WatercareApi(USERNAME, PASSWORD, cache=ResponseCache(max_bytes=0), **urls)
+        accounts = await api.async_get_accounts()
+        targets = [(a, e) for a in accounts for e in args.endpoints]
+        semaphore = asyncio.Semaphore(args.concurrency)
+        results = []
+
+        async def poll(index: int):
+            account, endpoint = targets[index % len(targets)]
+            async with semaphore:
+                start = time.perf_counter()
+                payload = await api.get_usage(endpoint, account_number=account)
+                results.append((payload is not None, time.perf_counter() - start))
+
+        requests_before = mock.requests
+        start = time.perf_counter()
+        await asyncio.gather(*(poll(i) for i in range(args.polls)))
+        elapsed = time.perf_counter() - start
+        await api.async_close()
+
+        succeeded = sum(ok for ok, _ in results)
+        latencies = sorted(duration for _, duration in results)
+        print(
+            f"Polling: {len(accounts)} accounts x {len(args.endpoints)} endpoints, "
+            f"{args.polls} polls in {elapsed:.2f}s ({args.polls / elapsed:.1f}/s), "
+            f"concurrency {args.concurrency}"
+        )
+        print(
+            f"  succeeded {succeeded}, failed {args.polls - succeeded}, "
+            f"server requests {mock.requests - requests_before}"
+        )
+        print(
+            f"  latency median {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms"
+        )
+        print(f"  circuit breaker: {api.breaker.as_dict()}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    """Serve the mock, or drive the API against it."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0, help="delay in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="extra random ms")
+    parser.add_argument(
+        "--error-rate", type=float, default=0, help="fraction answered with 503"
+    )
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0, help="fraction answered with 429"
+    )
+    parser.add_argument("--accounts", type=int, default=1)
+    parser.add_argument(
+        "--days", type=int, default=7, help="days of smart meter readings returned"
+    )
+    parser.add_argument(
+        "--years", type=int, default=2, help="years of billing periods returned"
+    )
+    parser.add_argument("--token-lifetime", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drive", action="store_true", help="run the API against it")
+    parser.add_argument("--logins", type=int, default=5)
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--endpoints", nargs="+", default=["halfhourly"], choices=ENDPOINTS
+    )
+    args = parser.parse_args()
+
+    mock = MockWatercare(args)
+    if args.drive:
+        asyncio.run(drive(mock, args))
+        return
+
+    print(f"Usage API base: http://{args.host}:{args.port}/")
+    print(f"Token base:     http://{args.host}:{args.port}{POLICY_PATH}")
+    print(f"Sign in as {USERNAME} / {PASSWORD}")
+    web.run_app(build_app(mock), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()